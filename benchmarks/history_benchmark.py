@@ -0,0 +1,121 @@
+"""Benchmark: journaled, memory-mapped History vs. the previous JSON dict store.
+
+Run from the repository root:
+
+    python -m benchmarks.history_benchmark --existing 100000 --writes 500
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from source.model.History import History
+
+
+class LegacyHistory:
+    """The original store: a tuple-keyed dict rewritten with indent=4 on every add."""
+
+    def __init__(self, path):
+        self.path = path
+        self.message_map = self.load_data()
+
+    def load_data(self):
+        try:
+            with open(self.path, 'r') as file:
+                return {
+                    (item["source"]["id"], item["source"]["message_id"], item["destination"]["id"]):
+                        item["destination"]["message_id"]
+                    for item in json.load(file)
+                }
+        except Exception:
+            return {}
+
+    def save_data(self):
+        json_data = [
+            {
+                "source": {"id": s, "message_id": sm},
+                "destination": {"id": d, "message_id": dm}
+            }
+            for (s, sm, d), dm in self.message_map.items()
+        ]
+        with open(self.path, 'w') as file:
+            json.dump(json_data, file, indent=4)
+
+    def add_mapping(self, source_id, source_msg_id, dest_id, dest_msg_id):
+        self.message_map[(source_id, source_msg_id, dest_id)] = dest_msg_id
+        self.save_data()
+
+
+def _measure_writes(store, existing, writes):
+    start = time.perf_counter()
+    for i in range(existing, existing + writes):
+        store.add_mapping(-1001, i, -1002, i + 10)
+    return time.perf_counter() - start
+
+
+def _measure_open(factory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = factory()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return store, elapsed, peak, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--existing", type=int, default=100000, help="mappings already in the history")
+    parser.add_argument("--writes", type=int, default=500, help="mappings to add while timing")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "history.json")
+        legacy = LegacyHistory(legacy_path)
+        legacy.message_map = {(-1001, i, -1002): i + 10 for i in range(args.existing)}
+        legacy.save_data()
+        legacy_write = _measure_writes(legacy, args.existing, args.writes)
+        del legacy
+
+        index_path, journal_path = os.path.join(tmp, "history.idx"), os.path.join(tmp, "history.journal")
+        seeded = History(index_path, journal_path, compact_interval=args.existing + 1, legacy_path=None)
+        for i in range(args.existing):
+            seeded.add_mapping(-1001, i, -1002, i + 10)
+        seeded.close()
+        seeded = History(index_path, journal_path, legacy_path=None)
+        journaled_write = _measure_writes(seeded, args.existing, args.writes)
+        seeded.close()
+
+        legacy, legacy_open, legacy_peak, legacy_retained = _measure_open(lambda: LegacyHistory(legacy_path))
+        store, store_open, store_peak, store_retained = _measure_open(
+            lambda: History(index_path, journal_path, legacy_path=None))
+        expected = args.existing + args.writes
+        assert len(legacy.message_map) == expected
+        assert store.get_mapping(-1001, expected - 1, -1002) == expected + 9
+        assert store.get_mapping(-1001, expected, -1002) is None
+
+        lookups = range(0, expected, max(1, expected // 10000))
+        start = time.perf_counter()
+        for i in lookups:
+            legacy.message_map.get((-1001, i, -1002))
+        legacy_lookup = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in lookups:
+            store.get_mapping(-1001, i, -1002)
+        store_lookup = time.perf_counter() - start
+        store.close()
+
+    print(f"existing mappings: {args.existing}, timed writes: {args.writes}")
+    print(f"{'':22}{'legacy dict/json':>18}{'mmap index':>14}")
+    print(f"{'write (ms/op)':22}{legacy_write / args.writes * 1e3:18.3f}{journaled_write / args.writes * 1e3:14.3f}")
+    print(f"{'open (ms)':22}{legacy_open * 1e3:18.1f}{store_open * 1e3:14.1f}")
+    print(f"{'open peak heap (MB)':22}{legacy_peak / 2**20:18.1f}{store_peak / 2**20:14.1f}")
+    print(f"{'retained heap (MB)':22}{legacy_retained / 2**20:18.1f}{store_retained / 2**20:14.1f}")
+    print(f"{'lookup (us/op)':22}{legacy_lookup / len(lookups) * 1e6:18.2f}{store_lookup / len(lookups) * 1e6:14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark: compiled keyword filter vs. the previous per-keyword re.search loop.
+
+Builds a keyword list of plain words, a few regexes and a few invalid regexes,
+checks that both implementations agree on every generated message, and reports
+the time per message:
+
+    python -m benchmarks.keyword_filter_benchmark --keywords 300 --messages 20000
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from source.model.KeywordFilter import KeywordFilter
+
+WORDS = ["promo", "giveaway", "airdrop", "casino", "crypto", "bonus", "discount", "free", "winner", "nft",
+         "oferta", "grátis", "desconto", "скидка", "бесплатно", "İstanbul", "straße"]
+REGEXES = [r"\bt\.me/\w+", r"https?://\S+", r"\d{3}-\d{4}", r"(buy|sell) now", r"(\w)\1{3}", r"^urgent"]
+INVALID = ["[vip", "*star", "(free"]
+
+
+def legacy_matches_any(text, patterns):
+    """The implementation ForwardConfig._matches_any used before the compiled filter."""
+    if not patterns:
+        return False
+    for p in patterns:
+        try:
+            if re.search(p, text, re.IGNORECASE):
+                return True
+        except re.error:
+            if p.lower() in text.lower():
+                return True
+    return False
+
+
+def _keywords(count, rng):
+    keywords = REGEXES + INVALID + WORDS
+    alphabet = string.ascii_lowercase
+    while len(keywords) < count:
+        keywords.append("".join(rng.choice(alphabet) for _ in range(rng.randint(5, 12))))
+    return keywords[:count]
+
+
+def _messages(count, keywords, rng):
+    vocabulary = ["hello", "channel", "news", "update", "today", "meeting", "Привет", "olá", "2024", "Işık"]
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(5, 40))]
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords).upper())
+        messages.append(" ".join(words))
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keywords", type=int, default=300, help="number of keywords per rule")
+    parser.add_argument("--messages", type=int, default=20000, help="number of messages to filter")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    keywords = _keywords(args.keywords, rng)
+    messages = _messages(args.messages, keywords, rng)
+
+    start = time.perf_counter()
+    keyword_filter = KeywordFilter(keywords)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [legacy_matches_any(message, keywords) for message in messages]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [keyword_filter.matches(message) for message in messages]
+    compiled_time = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+    print(f"{len(keywords)} keywords, {len(messages)} messages, {sum(expected)} matching, {mismatches} mismatches")
+    print(f"compile: {compile_time * 1000:.1f} ms")
+    print(f"{'':18}{'re.search loop':>16}{'compiled':>12}")
+    print(f"{'us per message':18}{legacy_time / len(messages) * 1e6:16.1f}{compiled_time / len(messages) * 1e6:12.1f}")
+    if mismatches:
+        raise SystemExit("compiled filter disagrees with the previous implementation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark: spooled in-memory media pipe vs. the previous media/ file round trip.
+
+Simulates the download -> upload -> cleanup cycle of MessageForwardService for a
+mix of file sizes and reports wall time and bytes that touched the filesystem.
+Run it on the target host (results differ a lot between tmpfs and real disks):
+
+    python -m benchmarks.media_pipe_benchmark --files 200 --directory media
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from source.utils.Constants import MEDIA_SPOOL_THRESHOLD
+
+CHUNK_SIZE = 128 * 1024
+
+
+def _sizes(count, seed=1):
+    rng = random.Random(seed)
+    # Mostly photos and short clips, with the occasional large video
+    return [rng.choice((150_000, 400_000, 2_000_000, 8_000_000, 60_000_000)) for _ in range(count)]
+
+
+def _download(target, size):
+    chunk = os.urandom(CHUNK_SIZE)
+    remaining = size
+    while remaining > 0:
+        target.write(chunk[:min(CHUNK_SIZE, remaining)])
+        remaining -= CHUNK_SIZE
+
+
+def _upload(source):
+    while source.read(CHUNK_SIZE):
+        pass
+
+
+def legacy_round_trip(directory, sizes):
+    disk_bytes = 0
+    start = time.perf_counter()
+    for i, size in enumerate(sizes):
+        path = os.path.join(directory, f"bench_{i}.bin")
+        with open(path, "wb") as file:
+            _download(file, size)
+        with open(path, "rb") as file:
+            _upload(file)
+        os.remove(path)
+        disk_bytes += 2 * size
+    return time.perf_counter() - start, disk_bytes
+
+
+def spooled_round_trip(sizes, threshold):
+    disk_bytes = 0
+    start = time.perf_counter()
+    for size in sizes:
+        with tempfile.SpooledTemporaryFile(max_size=threshold) as file:
+            _download(file, size)
+            file.seek(0)
+            _upload(file)
+        if size > threshold:
+            disk_bytes += 2 * size
+    return time.perf_counter() - start, disk_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="number of media items")
+    parser.add_argument("--directory", default=None, help="directory for the legacy files (default: a temp dir)")
+    parser.add_argument("--threshold", type=int, default=MEDIA_SPOOL_THRESHOLD, help="spool threshold in bytes")
+    args = parser.parse_args()
+
+    sizes = _sizes(args.files)
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        legacy_time, legacy_disk = legacy_round_trip(directory, sizes)
+    spooled_time, spooled_disk = spooled_round_trip(sizes, args.threshold)
+
+    total = sum(sizes)
+    print(f"{args.files} items, {total / 2**20:.1f} MB payload, spool threshold {args.threshold / 2**20:.1f} MB")
+    print(f"{'':18}{'media/ files':>14}{'spooled pipe':>14}")
+    print(f"{'wall time (s)':18}{legacy_time:14.2f}{spooled_time:14.2f}")
+    print(f"{'disk I/O (MB)':18}{legacy_disk / 2**20:14.1f}{spooled_disk / 2**20:14.1f}")
+    print(f"{'files created':18}{len(sizes):14d}{sum(size > args.threshold for size in sizes):14d}")
+
+
+if __name__ == "__main__":
+    main()
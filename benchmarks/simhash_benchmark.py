@@ -0,0 +1,83 @@
+"""Benchmark: SimHash near-duplicate index throughput and accuracy.
+
+Generates synthetic channel posts: a pool of announcements that get reposted
+with small edits (emoji, tracking parameters, an extra word) mixed with unique
+posts. Every message is signed, looked up and added to the index, as the
+forwarder does, and the report shows messages per second plus how many
+reposts were caught and how many unique posts were wrongly suppressed:
+
+    python -m benchmarks.simhash_benchmark --messages 1000000 --distance 3
+"""
+import argparse
+import random
+import time
+
+from source.model.SimHashIndex import SimHashIndex, simhash
+
+VOCABULARY = ("release update channel join today free bonus code price market token launch event news "
+              "community giveaway winner limited offer stream video weekly report season team new big "
+              "details announcement partner listing airdrop wallet support guide tips members live").split()
+EMOJI = ["🚀", "🔥", "✅", "📢", "💰", "🎉", ""]
+
+
+def _post(rng):
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(12, 40))]
+    return " ".join(words) + f" https://example.com/p/{rng.randrange(10**6)}"
+
+
+def _repost(post, rng):
+    edit = rng.randrange(3)
+    if edit == 0:
+        return f"{rng.choice(EMOJI)} {post} {rng.choice(EMOJI)}"
+    if edit == 1:
+        return f"{post}?utm_source=tg&ref={rng.randrange(10**6)}"
+    words = post.split()
+    words.insert(rng.randrange(len(words)), rng.choice(VOCABULARY))
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000, help="number of messages")
+    parser.add_argument("--distance", type=int, default=3, help="maximum Hamming distance")
+    parser.add_argument("--repost-rate", type=float, default=0.3, help="share of messages that are reposts")
+    parser.add_argument("--window", type=int, default=100_000, help="signatures kept in the index")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    index = SimHashIndex(args.distance, max_entries=args.window)
+    recent = []
+    reposts = caught = uniques = false_hits = 0
+
+    start = time.perf_counter()
+    for _ in range(args.messages):
+        is_repost = bool(recent) and rng.random() < args.repost_rate
+        if is_repost:
+            text = _repost(rng.choice(recent), rng)
+        else:
+            text = _post(rng)
+            recent.append(text)
+            if len(recent) > 1000:
+                recent.pop(0)
+
+        signature = simhash(text)
+        duplicate = signature is not None and index.find(signature) is not None
+        if signature is not None and not duplicate:
+            index.add(signature, ttl=3600)
+
+        if is_repost:
+            reposts += 1
+            caught += duplicate
+        else:
+            uniques += 1
+            false_hits += duplicate
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.messages} messages in {elapsed:.1f}s: {args.messages / elapsed:,.0f} messages/s "
+          f"({elapsed / args.messages * 1e6:.1f} us each), index size {len(index)}")
+    print(f"reposts caught: {caught}/{reposts} ({caught / max(reposts, 1):.1%}), "
+          f"unique posts suppressed: {false_hits}/{uniques} ({false_hits / max(uniques, 1):.3%})")
+
+
+if __name__ == "__main__":
+    main()
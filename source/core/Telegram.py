@@ -1,4 +1,4 @@
-import os
+import asyncio
 import telethon
 from telethon.sync import TelegramClient
 from telethon.tl.types import InputPeerEmpty
@@ -6,7 +6,10 @@ from source.utils.Console import Terminal
 
 from source.model.Chat import Chat
 from source.service.Forward import Forward
-from source.utils.Constants import SESSION_PREFIX_PATH, MEDIA_FOLDER_PATH
+from source.service.HistoryService import HistoryService
+from source.service.MediaCacheService import MediaCacheService
+from source.service.RequestScheduler import priority, BULK
+from source.utils.Constants import SESSION_PREFIX_PATH
 from source.service.ChatService import ChatService
 from source.service.MessageService import MessageService
 from source.service.ExportService import ExportService
@@ -62,6 +65,8 @@ class Telegram:
                 await self.client.disconnect()
             finally:
                 self._is_connected = False
+                HistoryService().close()
+                MediaCacheService.shared().flush()
 
     async def get_me(self):
         """Gets the current user's information."""
@@ -88,7 +93,8 @@ class Telegram:
             if not self._should_process_dialog(dialog, me.id, ignored_ids):
                 continue
 
-            await self.message_service.delete_messages_from_dialog(dialog, me.id)
+            with priority(BULK):
+                await self.message_service.delete_messages_from_dialog(dialog, me.id)
 
     async def find_user(self, config):
         """Finds and downloads messages from a specific user.
@@ -118,33 +124,66 @@ class Telegram:
                 if isinstance(chat, telethon.tl.types.User):
                     continue
 
-                await self.message_service.process_user_messages(chat, wanted_user_entity, message_limit)
+                with priority(BULK):
+                    await self.message_service.process_user_messages(chat, wanted_user_entity, message_limit)
 
             except Exception as e:
                 print(f"Error processing dialog: {e}")
 
-    async def start_forward_live(self, forward_config):
-        """Starts live message forwarding."""
+    async def start_forward_live(self, forward_config, catch_up=False):
+        """Starts live message forwarding.
+
+        With ``catch_up``, history missed since the last run is forwarded in the
+        background at bulk priority, so live messages keep precedence. Messages
+        that already have a copy, e.g. from earlier live sessions, are skipped,
+        and destinations that never received history start at the newest message.
+        """
         forward = Forward(self.client, forward_config)
         forward.add_events()
-        await self.client.run_until_disconnected()
-
-    async def past_forward(self, forward_config):
-        """Forwards historical messages."""
+        catch_up_task = None
+        if catch_up:
+            with priority(BULK):
+                catch_up_task = asyncio.create_task(forward.history_handler(catch_up=True))
+        try:
+            await self.client.run_until_disconnected()
+        finally:
+            if catch_up_task:
+                catch_up_task.cancel()
+                await asyncio.gather(catch_up_task, return_exceptions=True)
+            await forward.live_queue.stop()
+
+    async def past_forward(self, forward_config, reset=False):
+        """Forwards historical messages, resuming from saved checkpoints unless reset."""
         forward = Forward(self.client, forward_config)
-        await forward.history_handler()
+        with priority(BULK):
+            await forward.history_handler(reset)
 
     async def export_chat_history(self, config):
         """Exports chat history to a file.
         
         Args:
-            config: tuple containing (chat_object, format_type)
+            config: tuple containing (chat_object, format_type, incremental, compress)
+        """
+        if not config:
+            return
+            
+        chat, format_type, incremental, compress = config
+        with priority(BULK):
+            await self.export_service.export_chat(chat.id, format_type, incremental=incremental, compress=compress)
+
+    async def export_chats_history(self, config):
+        """Exports the history of several chats concurrently.
+        
+        Args:
+            config: tuple containing (chat_objects, format_type, incremental, compress, concurrency)
         """
         if not config:
             return
             
-        chat, format_type = config
-        await self.export_service.export_chat(chat.id, format_type)
+        chats, format_type, incremental, compress, concurrency = config
+        with priority(BULK):
+            await self.export_service.export_chats([chat.id for chat in chats], format_type, incremental, compress,
+                                                   concurrency)
 
     async def broadcast_message(self, config):
         """Broadcasts a message to multiple chats.
@@ -156,18 +195,19 @@ class Telegram:
             return
             
         chats, message_text = config
-        await self.broadcast_service.send_broadcast(chats, message_text)
+        with priority(BULK):
+            await self.broadcast_service.send_broadcast(chats, message_text)
 
     async def clone_channel(self, config):
         """Clones messages from one channel to another.
         
         Args:
-            config: tuple containing (source_chat, dest_chat)
+            config: tuple containing (source_chat, dest_chat, reset, fast)
         """
         if not config:
             return
             
-        source, destination = config
+        source, destination, reset, fast = config
         
         # Create a temporary ForwardConfig
         fw_conf = ForwardConfig()
@@ -177,10 +217,11 @@ class Telegram:
         fw_conf.destinationName = destination.title
         
         # Reuse the Forward service logic
-        forward = Forward(self.client, {source.id: fw_conf})
+        forward = Forward(self.client, [fw_conf])
         
         self.console.print(f"[bold green]Starting clone from {source.title} to {destination.title}...[/bold green]")
-        await forward.history_handler()
+        with priority(BULK):
+            await forward.history_handler(reset, copy=fast)
         self.console.print("[bold green]Clone completed![/bold green]")
 
     async def show_statistics(self):
@@ -188,9 +229,8 @@ class Telegram:
         await self.statistics_service.show_statistics(self.client)
 
     async def download_media(self, message):
-        """Downloads media from a message."""
-        os.makedirs(MEDIA_FOLDER_PATH, exist_ok=True)
-        return await self.client.download_media(message, file=MEDIA_FOLDER_PATH)
+        """Downloads media from a message, reusing the shared media cache."""
+        return await MediaCacheService.shared().download(self.client, message)
 
     def _should_process_dialog(self, dialog, my_id, ignored_ids):
         """Determines if a dialog should be processed for deletion."""
@@ -25,6 +25,18 @@ class BaseDialog:
     def clear(self):
         self.console.clear()
 
+    async def ask_reset_progress(self):
+        """Ask whether an interrupted run should resume or start over.
+
+        Returns:
+            bool: True to discard saved progress and start from the beginning
+        """
+        choice = await self.show_options("Saved progress:", [
+            {"name": "Resume from the last forwarded message", "value": "resume"},
+            {"name": "Start over from the beginning", "value": "reset"}
+        ])
+        return choice == "reset"
+
     async def list_chats_terminal(self, chats, type_label):
         """Shows a list of chats for selection."""
         options = [{"name": "↩ Back to Menu", "value": "-1"}]
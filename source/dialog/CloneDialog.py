@@ -6,7 +6,7 @@ class CloneDialog(BaseDialog):
         """Get clone configuration from user.
         
         Returns:
-            tuple: (source_chat, destination_chat) or None if cancelled
+            tuple: (source_chat, destination_chat, reset, fast) or None if cancelled
         """
         while True:
             self.clear()
@@ -40,7 +40,12 @@ class CloneDialog(BaseDialog):
             )
             
             if confirm == "yes":
-                return source_chat, dest_chat
+                mode = await self.show_options("Clone mode:", [
+                    {"name": "Fast (copy on Telegram's servers, sender hidden)", "value": "fast"},
+                    {"name": "Full (download and re-upload every message)", "value": "full"}
+                ])
+                reset = await self.ask_reset_progress()
+                return source_chat, dest_chat, reset, mode == "fast"
             elif confirm == "cancel":
                 return None
             # If no, loop repeats
@@ -1,12 +1,16 @@
 from source.dialog.BaseDialog import BaseDialog
 from source.model.Chat import Chat
+from source.utils.Constants import EXPORT_CONCURRENCY
+from InquirerPy import inquirer
+
+MAX_CONCURRENCY = 32
 
 class ExportDialog(BaseDialog):
     async def get_config(self):
         """Get export configuration from user.
         
         Returns:
-            tuple: (chat, format_type) or None if cancelled
+            tuple: (chat, format_type, incremental, compress) or None if cancelled
         """
         self.clear()
         
@@ -23,9 +27,60 @@ class ExportDialog(BaseDialog):
             
         selected_chat = chats[chat_index]
         
+        options = await self._ask_format()
+        if options is None:
+            return None
+            
+        return (selected_chat, *options)
+
+    async def get_bulk_config(self):
+        """Get bulk export configuration from user.
+        
+        Returns:
+            tuple: (chats, format_type, incremental, compress, concurrency) or None if cancelled
+        """
+        self.clear()
+        
+        chats = Chat.read()
+        if not chats:
+            self.console.print("[yellow]No chats found. Please run 'List Chats' first.[/yellow]")
+            return None
+
+        scope = await self.show_options("Chats to export:", [
+            {"name": "All chats from 'List Chats'", "value": "all"},
+            {"name": "Select chats", "value": "select"},
+            {"name": "↩ Back to Menu", "value": "back"}
+        ])
+        if scope == "back":
+            return None
+        selected_chats = chats if scope == "all" else await self.select_multiple_chats(chats, "Select chats to export:")
+        if not selected_chats:
+            return None
+            
+        options = await self._ask_format()
+        if options is None:
+            return None
+            
+        concurrency = await inquirer.text(
+            message=f"Chats to export at the same time (1-{MAX_CONCURRENCY}):",
+            default=str(EXPORT_CONCURRENCY),
+            validate=lambda x: x.isdigit() and 1 <= int(x) <= MAX_CONCURRENCY,
+            invalid_message=f"Please enter a number between 1 and {MAX_CONCURRENCY}"
+        ).execute_async()
+            
+        return (selected_chats, *options, int(concurrency))
+
+    async def _ask_format(self):
+        """Ask for the export format and mode.
+        
+        Returns:
+            tuple: (format_type, incremental, compress) or None if cancelled
+        """
         format_options = [
             {"name": "JSON (Complete data)", "value": "json"},
+            {"name": "JSON Lines (One message per line)", "value": "jsonl"},
             {"name": "Text (Readable)", "value": "txt"},
+            {"name": "SQLite (Searchable database)", "value": "sqlite"},
             {"name": "↩ Back to Menu", "value": "back"}
         ]
         
@@ -34,4 +89,17 @@ class ExportDialog(BaseDialog):
         if format_type == "back":
             return None
             
-        return selected_chat, format_type
+        mode = await self.show_options("Export mode:", [
+            {"name": "Full (new file with the whole history)", "value": "full"},
+            {"name": "Incremental (add messages newer than the last export)", "value": "incremental"}
+        ])
+        
+        compress = False
+        if format_type != "sqlite":
+            output = await self.show_options("Output:", [
+                {"name": "Plain file", "value": "plain"},
+                {"name": "Compressed chunks with an index (zstd if installed, else gzip)", "value": "compressed"}
+            ])
+            compress = output == "compressed"
+            
+        return format_type, mode == "incremental", compress
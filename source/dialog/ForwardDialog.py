@@ -6,7 +6,7 @@ class ForwardDialog(BaseDialog):
         """Get forward configuration from user.
         
         Returns:
-            Dict mapping source chat IDs to their forward configurations
+            List of forward configurations; a source may be routed to several destinations
         """
         self.clear()
         return await self._get_forward_config()
@@ -15,7 +15,7 @@ class ForwardDialog(BaseDialog):
         """Get forward configuration settings.
         
         Returns:
-            Dict mapping source chat IDs to their forward configurations
+            List of forward configurations; a source may be routed to several destinations
         """
         forward_config_list = await ForwardConfig.get_all(True)
         config_string = '\n   '.join(str(config) for config in forward_config_list)
@@ -34,4 +34,16 @@ class ForwardDialog(BaseDialog):
         if choice == "2":
             forward_config_list = await ForwardConfig.get_all(False)
         
-        return {item.sourceID: item for item in forward_config_list}
+        return forward_config_list
+
+    async def ask_catch_up(self):
+        """Ask whether live forwarding should also send the history missed since the last run.
+
+        Returns:
+            bool: True to forward missed history in the background
+        """
+        choice = await self.show_options("Missed messages:", [
+            {"name": "Forward new messages only", "value": "live"},
+            {"name": "Also catch up on history since the last run", "value": "catch_up"}
+        ])
+        return choice == "catch_up"
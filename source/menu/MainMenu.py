@@ -32,6 +32,7 @@ class MainMenu:
             {"name": "Past Forward Messages", "value": "6", "handler": self.past_forward},
             {"name": "Clone Channel (Wizard)", "value": "10", "handler": self.clone_channel},
             {"name": "Export Chat History", "value": "8", "handler": self.export_chat},
+            {"name": "Bulk Export Chats", "value": "12", "handler": self.export_chats},
             {"name": "Broadcast Message", "value": "9", "handler": self.broadcast_message},
             {"name": "Statistics", "value": "11", "handler": self.show_statistics},
             {"name": "Switch Account", "value": "7", "handler": self.switch_account},
@@ -76,12 +77,14 @@ class MainMenu:
     async def live_forward(self):
         config = await self.forward_dialog.get_config()
         if config:
-            await self.telegram.start_forward_live(config)
+            catch_up = await self.forward_dialog.ask_catch_up()
+            await self.telegram.start_forward_live(config, catch_up)
 
     async def past_forward(self):
         config = await self.forward_dialog.get_config()
         if config:
-            await self.telegram.past_forward(config)
+            reset = await self.forward_dialog.ask_reset_progress()
+            await self.telegram.past_forward(config, reset)
 
     async def delete_messages(self):
         ignore_chats = await self.delete_dialog.get_config()
@@ -98,6 +101,11 @@ class MainMenu:
         if config:
             await self.telegram.export_chat_history(config)
 
+    async def export_chats(self):
+        config = await self.export_dialog.get_bulk_config()
+        if config:
+            await self.telegram.export_chats_history(config)
+
     async def broadcast_message(self):
         config = await self.broadcast_dialog.get_config()
         if config:
@@ -0,0 +1,64 @@
+import json
+import os
+import time
+from source.utils.Constants import CHECKPOINT_FILE_PATH, CHECKPOINT_SAVE_INTERVAL
+
+class Checkpoint:
+    """Last forwarded message id per (source chat, destination chat) pair.
+
+    Past forward and clone runs record every confirmed send here, so an
+    interrupted run resumes after the last message that actually arrived. The
+    file is small (one entry per pair) and is replaced atomically, at most every
+    ``save_interval`` seconds and on ``flush()``. A crash in between only makes
+    the next run resume a little earlier; messages that already have a copy are
+    skipped then.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE_PATH, save_interval=CHECKPOINT_SAVE_INTERVAL):
+        self.path = path
+        self.save_interval = save_interval
+        self.checkpoints = self.load_data()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    @staticmethod
+    def _key(source_id, dest_id):
+        return f"{source_id}:{dest_id}"
+
+    def load_data(self):
+        try:
+            with open(self.path, 'r') as file:
+                return json.load(file)
+        except Exception:
+            return {}
+
+    def save_data(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.checkpoints, file, indent=4)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self):
+        """Writes the checkpoints if they changed since the last save."""
+        if self._dirty:
+            self.save_data()
+
+    def get(self, source_id, dest_id):
+        return self.checkpoints.get(self._key(source_id, dest_id), 0)
+
+    def update(self, source_id, dest_id, message_id):
+        key = self._key(source_id, dest_id)
+        if message_id > self.checkpoints.get(key, 0):
+            self.checkpoints[key] = message_id
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self.save_data()
+
+    def reset(self, source_id, dest_id):
+        if self.checkpoints.pop(self._key(source_id, dest_id), None) is not None:
+            self.save_data()
@@ -0,0 +1,163 @@
+import hashlib
+import heapq
+import os
+import struct
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from source.utils.Constants import DEDUP_MAX_ENTRIES, DEDUP_SAVE_INTERVAL, DEDUP_RETENTION_SECONDS
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Snapshot layout (little endian): header (magic, entry count), then the uint64 fingerprint column
+# followed by three float64 columns: duplicate window start and end (message time) and retention expiry
+# (wall-clock time)
+_MAGIC = b"FWDDEDU2"
+_HEADER = struct.Struct("<8sQ")
+
+
+def fingerprint_hash(data: bytes) -> int:
+    """64-bit fingerprint of ``data``: xxh3 when xxhash is installed, blake2b otherwise."""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class DedupStore:
+    """Recently forwarded message fingerprints, bounded by age and by count.
+
+    Every fingerprint carries its own duplicate window: a message posted at
+    ``at`` is a duplicate of one recorded at ``record_time`` with ``ttl`` if
+    ``record_time <= at < record_time + ttl``. Callers replaying old messages
+    pass the message date, so the window is checked per lookup and history
+    lanes working on different periods, or live forwarding next to them, never
+    invalidate each other's entries.
+
+    Removal only follows wall-clock time: an entry is retained for
+    ``max(ttl, DEDUP_RETENTION_SECONDS)`` seconds after it was recorded, and
+    when ``max_entries`` is exceeded the entry whose retention ends first is
+    evicted. Retention ends are kept in a min-heap next to the entries, so both
+    cost O(log n); stale heap entries left by re-recording are skipped when
+    popped and the heap is rebuilt once they outnumber the live ones.
+
+    With a ``path`` the store is written there every ``save_interval`` records
+    and on close, and loaded on start, so dedup survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = DEDUP_MAX_ENTRIES,
+                 save_interval: int = DEDUP_SAVE_INTERVAL, retention: float = DEDUP_RETENTION_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self.retention = retention
+        # fingerprint -> (window start, window end, retention expiry)
+        self._entries: Dict[int, Tuple[float, float, float]] = {}
+        self._heap: List[Tuple[float, int]] = []
+        self._unsaved = 0
+        self.load_data()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load_data(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as file:
+                magic, count = _HEADER.unpack(file.read(_HEADER.size))
+                if magic != _MAGIC:
+                    raise ValueError(f"unexpected header {magic!r}")
+                fingerprints = array("Q")
+                starts, ends, expiries = array("d"), array("d"), array("d")
+                fingerprints.fromfile(file, count)
+                starts.fromfile(file, count)
+                ends.fromfile(file, count)
+                expiries.fromfile(file, count)
+        except Exception as e:
+            print(f"Error loading dedup store: {e}")
+            return
+        now = time.time()
+        for fingerprint, start, end, expiry in zip(fingerprints, starts, ends, expiries):
+            if expiry > now:
+                self._entries[fingerprint] = (start, end, expiry)
+        self._rebuild_heap()
+        self._evict_overflow()
+
+    def save_data(self) -> None:
+        if not self.path:
+            return
+        self._expire(time.time())
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = self._entries.values()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, len(self._entries)))
+            array("Q", self._entries.keys()).tofile(file)
+            for column in range(3):
+                array("d", (entry[column] for entry in entries)).tofile(file)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+    def close(self) -> None:
+        if self._unsaved:
+            self.save_data()
+
+    def contains(self, fingerprint: int, at: Optional[float] = None) -> bool:
+        """Whether a message posted at ``at`` (default: now) falls in the window of ``fingerprint``."""
+        entry = self._entries.get(fingerprint)
+        if entry is None:
+            return False
+        now = time.time()
+        if entry[2] <= now:
+            self._expire(now)
+            return False
+        at = now if at is None else at
+        return entry[0] <= at < entry[1]
+
+    def add(self, fingerprint: int, ttl: float, at: Optional[float] = None) -> None:
+        """Record ``fingerprint`` for messages posted within ``ttl`` seconds from ``at`` (default: now)."""
+        now = time.time()
+        start = now if at is None else at
+        end = start + ttl
+        previous = self._entries.get(fingerprint)
+        if previous is not None and previous[0] <= end and start <= previous[1]:
+            # Overlapping windows, e.g. the same post seen again: cover both
+            start, end = min(start, previous[0]), max(end, previous[1])
+        expiry = now + max(ttl, self.retention)
+        self._entries[fingerprint] = (start, end, expiry)
+        heapq.heappush(self._heap, (expiry, fingerprint))
+        self._expire(now)
+        self._evict_overflow()
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._rebuild_heap()
+
+        self._unsaved += 1
+        if self.path and self._unsaved >= self.save_interval:
+            try:
+                self.save_data()
+            except Exception as e:
+                print(f"Error saving dedup store: {e}")
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(entry[2], fingerprint) for fingerprint, entry in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def _pop(self) -> None:
+        expiry, fingerprint = heapq.heappop(self._heap)
+        entry = self._entries.get(fingerprint)
+        if entry is not None and entry[2] == expiry:
+            del self._entries[fingerprint]
+
+    def _expire(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            self._pop()
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._pop()
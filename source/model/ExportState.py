@@ -0,0 +1,49 @@
+import json
+import os
+from source.utils.Constants import EXPORT_STATE_FILE_PATH
+
+class ExportState:
+    """Highest exported message id and archive path per (chat, export format).
+
+    Incremental exports read it to fetch only newer messages and append them to
+    the same archive. The file is small (one entry per chat and format) and is
+    replaced atomically on each update.
+    """
+
+    def __init__(self, path=EXPORT_STATE_FILE_PATH):
+        self.path = path
+        self.state = self.load_data()
+
+    @staticmethod
+    def _key(chat_id, format_type):
+        return f"{chat_id}:{format_type}"
+
+    def load_data(self):
+        try:
+            with open(self.path, 'r') as file:
+                return json.load(file)
+        except Exception:
+            return {}
+
+    def save_data(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.state, file, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def get(self, chat_id, format_type):
+        """Returns (highest exported message id, archive path), or (0, None) if the chat was never exported."""
+        entry = self.state.get(self._key(chat_id, format_type))
+        if entry is None:
+            return 0, None
+        return entry["max_id"], entry["path"]
+
+    def update(self, chat_id, format_type, max_id, path):
+        key = self._key(chat_id, format_type)
+        entry = self.state.get(key)
+        if entry is None or entry["path"] != path or max_id > entry["max_id"]:
+            self.state[key] = {"max_id": max_id, "path": path}
+            self.save_data()
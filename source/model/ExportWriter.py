@@ -0,0 +1,478 @@
+import gzip
+import io
+import json
+import logging
+import os
+import sqlite3
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Dict, List, Optional, TextIO, Tuple
+
+from source.utils.Constants import (EXPORT_FLUSH_INTERVAL, EXPORT_SQLITE_BATCH_SIZE, EXPORT_COMPRESSION,
+                                    EXPORT_CHUNK_BYTES, EXPORT_GZIP_LEVEL, EXPORT_ZSTD_LEVEL)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class ExportWriter(ABC):
+    """Writes exported messages one at a time, as they are fetched.
+
+    Nothing is kept beyond the current batch, so memory use does not depend on
+    the size of the chat. Output is flushed every ``flush_interval`` messages,
+    so an interrupted export leaves everything up to the last flush on disk.
+    ``flushed_id`` is the highest message id known to be on disk, which is
+    what incremental exports may record as done. ``resumed_id`` is the highest
+    id already in an export that was reopened for appending.
+    """
+
+    extension = ""
+
+    def __init__(self, path: str, flush_interval: int = EXPORT_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.closed = False
+        self.flushed_id = 0
+        self.resumed_id = 0
+        self._written_id = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._write_record(record)
+        self.count += 1
+        self._written_id = max(self._written_id, record['id'])
+        if self.count % self.flush_interval == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        self._flush()
+        self.flushed_id = self._written_id
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._finish()
+        self.flushed_id = self._written_id
+
+    @abstractmethod
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        """Write one message record."""
+
+    def _flush(self) -> None:
+        pass
+
+    def _finish(self) -> None:
+        pass
+
+
+class FileExportWriter(ExportWriter):
+    """Export written to a text file, either a new one or appended to an earlier export,
+    or to an already opened ``stream`` such as a compressed chunk."""
+
+    def __init__(self, path: str, append: bool = False, flush_interval: int = EXPORT_FLUSH_INTERVAL,
+                 stream: Optional[TextIO] = None):
+        super().__init__(path, flush_interval)
+        self._owns_file = stream is None
+        if stream is not None:
+            self._file = stream
+            self._start()
+        elif append and os.path.exists(path):
+            self._file = self._reopen()
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+            self._start()
+
+    def _start(self) -> None:
+        pass
+
+    def _reopen(self) -> TextIO:
+        return open(self.path, 'a', encoding='utf-8')
+
+    def _read_tail(self, file: BinaryIO) -> Tuple[int, bytes]:
+        """Offset and content of the last _TAIL_BYTES of ``file``, enough to hold the last records."""
+        size = file.seek(0, os.SEEK_END)
+        tail_start = max(0, size - _TAIL_BYTES)
+        file.seek(tail_start)
+        return tail_start, file.read()
+
+    def _flush(self) -> None:
+        self._file.flush()
+        if self._owns_file:
+            os.fsync(self._file.fileno())
+
+    def _finish(self) -> None:
+        try:
+            self._end()
+        finally:
+            self._file.close()
+
+    def _end(self) -> None:
+        pass
+
+
+class JsonExportWriter(FileExportWriter):
+    """A JSON array, laid out like ``json.dump(messages, indent=4)``.
+
+    The array is closed on ``close``, including after an error, so a partial
+    export is still a valid document. Appending reopens the array and
+    continues it; an array left unclosed by a killed process is cut back to
+    its last complete record first.
+    """
+
+    extension = "json"
+    _has_items = False
+
+    def _start(self) -> None:
+        self._file.write("[")
+
+    def _reopen(self) -> TextIO:
+        """Reopen the array of an earlier export by cutting off its closing bracket.
+
+        Records are written with a closing brace indented by exactly four
+        spaces, which occurs nowhere else, so the end of the last complete
+        record can be found even if the array was never closed.
+        """
+        with open(self.path, 'rb+') as file:
+            tail_start, tail = self._read_tail(file)
+            stripped = tail.rstrip()
+            if stripped.endswith(b"]"):
+                content = stripped[:-1].rstrip()
+            else:
+                end = tail.rfind(b"\n    }")
+                if end >= 0:
+                    content = tail[:end + 6]
+                elif tail_start == 0 and stripped.startswith(b"["):
+                    content = b"["
+                else:
+                    raise ValueError(f"{self.path} is not a JSON array export")
+            self._has_items = not content.endswith(b"[")
+            if self._has_items:
+                self.resumed_id = json.loads(content[content.rfind(b"\n    {"):])['id']
+            file.truncate(tail_start + len(content))
+        return open(self.path, 'a', encoding='utf-8')
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        item = json.dumps(record, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+        self._file.write(f"{',' if self._has_items else ''}\n    {item}")
+        self._has_items = True
+
+    def _end(self) -> None:
+        self._file.write("\n]" if self._has_items else "]")
+
+
+class JsonlExportWriter(FileExportWriter):
+    """One JSON object per line; every complete line is usable even if the export is killed."""
+
+    extension = "jsonl"
+
+    def _reopen(self) -> TextIO:
+        """Reopen for appending, dropping a last line left incomplete by a killed process."""
+        with open(self.path, 'rb+') as file:
+            tail_start, tail = self._read_tail(file)
+            end = tail.rfind(b"\n") + 1
+            if end == 0 and tail_start > 0:
+                raise ValueError(f"{self.path} is not a JSON lines export")
+            file.truncate(tail_start + end)
+            lines = tail[:end].splitlines()
+            if lines:
+                self.resumed_id = json.loads(lines[-1])['id']
+        return open(self.path, 'a', encoding='utf-8')
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class TxtExportWriter(FileExportWriter):
+    """Human readable ``[date] sender: text`` lines."""
+
+    extension = "txt"
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        sender = record['sender_id'] or "Unknown"
+        text = record['text'] or "[Media/Empty]"
+        self._file.write(f"[{record['date']}] {sender}: {text}\n")
+
+
+class SqliteExportWriter(ExportWriter):
+    """Export into an SQLite database that several chats share.
+
+    Messages of all chats go into one ``messages`` table, indexed by chat,
+    sender, date and reply id, with an FTS5 index over their text kept in sync
+    by triggers, so exported chats can be searched together offline::
+
+        SELECT m.chat_id, m.id, m.date, m.text FROM messages_fts
+        JOIN messages m ON m.rowid = messages_fts.rowid
+        WHERE messages_fts MATCH 'giveaway' ORDER BY m.date
+
+    Rows are inserted in batches of ``flush_interval``, one transaction each.
+    Exporting a chat again updates its rows in place.
+    """
+
+    extension = "db"
+
+    def __init__(self, path: str, chat_id: int, chat_name: str,
+                 flush_interval: int = EXPORT_SQLITE_BATCH_SIZE):
+        super().__init__(path, flush_interval)
+        self.chat_id = chat_id
+        self._rows: List[tuple] = []
+        self._connection = sqlite3.connect(path)
+        try:
+            self._connection.executescript(_SQLITE_SCHEMA)
+            self._create_fts_index()
+            with self._connection:
+                self._connection.execute(
+                    "INSERT INTO chats (chat_id, name, exported_at) VALUES (?, ?, datetime('now')) "
+                    "ON CONFLICT(chat_id) DO UPDATE SET name = excluded.name, exported_at = excluded.exported_at",
+                    (chat_id, chat_name))
+        except Exception:
+            self._connection.close()
+            raise
+
+    def _create_fts_index(self) -> None:
+        """Create the full-text index, filling it from existing rows if it is new; fails without FTS5."""
+        existed = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'").fetchone() is not None
+        try:
+            self._connection.executescript(_SQLITE_FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            logger.error(f"Error creating full-text index: {e}")
+            raise RuntimeError(f"SQLite export needs the FTS5 extension, which this SQLite build lacks ({e})") from e
+        if not existed and self._connection.execute("SELECT 1 FROM messages LIMIT 1").fetchone() is not None:
+            # Rows written before the index existed are indexed once here
+            with self._connection:
+                self._connection.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        self._rows.append((self.chat_id, record['id'], record['date'], record['sender_id'], record['text'],
+                           record['reply_to_msg_id'], int(record['media'])))
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO messages (chat_id, id, date, sender_id, text, reply_to_msg_id, media) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(chat_id, id) DO UPDATE SET date = excluded.date, sender_id = excluded.sender_id, "
+                "text = excluded.text, reply_to_msg_id = excluded.reply_to_msg_id, media = excluded.media",
+                self._rows)
+        self._rows = []
+
+    def _finish(self) -> None:
+        try:
+            self._flush()
+        finally:
+            self._connection.close()
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    chat_id INTEGER PRIMARY KEY,
+    name TEXT,
+    exported_at TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    chat_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    sender_id INTEGER,
+    text TEXT,
+    reply_to_msg_id INTEGER,
+    media INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (chat_id, id)
+);
+CREATE INDEX IF NOT EXISTS messages_chat_date ON messages (chat_id, date);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages (sender_id, date);
+CREATE INDEX IF NOT EXISTS messages_date ON messages (date);
+CREATE INDEX IF NOT EXISTS messages_reply ON messages (chat_id, reply_to_msg_id) WHERE reply_to_msg_id IS NOT NULL;
+"""
+
+_SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(text, content='messages', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF text ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+    INSERT INTO messages_fts (rowid, text) VALUES (new.rowid, new.text);
+END;
+"""
+
+FILE_WRITERS = {writer.extension: writer for writer in (JsonExportWriter, JsonlExportWriter, TxtExportWriter)}
+
+
+class ChunkedExportWriter(ExportWriter):
+    """File export written as compressed chunks of about ``chunk_bytes`` each, plus an index.
+
+    Every chunk is a complete document of its format (a JSON array, JSON lines
+    or text), compressed with zstd when the zstandard package is installed and
+    gzip otherwise, and is rotated once its compressed size reaches
+    ``chunk_bytes``. ``path`` is the index file; it lists every chunk with its
+    message count and the ranges of message ids and dates it holds, so readers
+    can pick the chunks of a date range (see ``chunks_for_range``) without
+    decompressing the others.
+
+    Every flush pushes the open chunk through the compressor to disk and
+    records it in the index as ``"complete": false`` with the messages flushed
+    so far, so progress recorded after a flush is always covered by the index;
+    such a chunk, cut short by a crash, decompresses at least up to its last
+    flush. Anything it holds past the indexed id range is exported again in the
+    next chunk, so readers of an incomplete chunk stop at its last indexed id.
+    Appending adds new chunks and extends the existing index; existing chunk
+    files are never overwritten.
+    """
+
+    def __init__(self, path: str, format_type: str, append: bool = False, chunk_bytes: int = EXPORT_CHUNK_BYTES,
+                 flush_interval: int = EXPORT_FLUSH_INTERVAL):
+        super().__init__(path, flush_interval)
+        if format_type not in FILE_WRITERS:
+            raise ValueError(f"Unsupported export format: {format_type}")
+        self.format_type = format_type
+        self.chunk_bytes = chunk_bytes
+        self._base = path[:-len(INDEX_SUFFIX)] if path.endswith(INDEX_SUFFIX) else path
+        if append and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+            self.resumed_id = max((chunk["ids"][1] for chunk in self._index["chunks"] if chunk["messages"]),
+                                  default=0)
+        else:
+            self._index = {"format": format_type, "compression": compression_method(), "chunks": []}
+        self._chunk: Optional[FileExportWriter] = None
+        self._raw: Optional[BinaryIO] = None
+        self._entry: Dict[str, Any] = {}
+
+    def _open_chunk(self) -> None:
+        compression = self._index["compression"]
+        extension = _COMPRESSED_EXTENSIONS[compression]
+        number = len(self._index["chunks"]) + 1
+        # A chunk left behind by a crashed run may be missing from the index; it keeps its file
+        while os.path.exists(chunk_path := f"{self._base}.part{number:04d}.{self.format_type}.{extension}"):
+            number += 1
+        stream, self._raw = _open_compressed(chunk_path, compression)
+        # The chunk writer never flushes on its own; this writer's flush interval applies across chunks
+        self._chunk = FILE_WRITERS[self.format_type](chunk_path, flush_interval=sys.maxsize, stream=stream)
+        self._entry = {"file": os.path.basename(chunk_path), "messages": 0}
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        if self._chunk is None:
+            self._open_chunk()
+        self._chunk.write(record)
+        entry = self._entry
+        if entry["messages"]:
+            entry["ids"] = [min(entry["ids"][0], record['id']), max(entry["ids"][1], record['id'])]
+            entry["dates"] = [min(entry["dates"][0], record['date']), max(entry["dates"][1], record['date'])]
+        else:
+            entry["ids"] = [record['id'], record['id']]
+            entry["dates"] = [record['date'], record['date']]
+        entry["messages"] += 1
+        if self._raw.tell() >= self.chunk_bytes:
+            self._close_chunk()
+
+    def _close_chunk(self) -> None:
+        try:
+            self._chunk.close()
+        finally:
+            self._raw.close()
+        self._entry["bytes"] = os.path.getsize(self._chunk.path)
+        self._entry["complete"] = True
+        self._index["chunks"].append(self._entry)
+        self._chunk = None
+        self._save_index()
+
+    def _save_index(self, pending: Optional[Dict[str, Any]] = None) -> None:
+        index = self._index if pending is None else {**self._index, "chunks": [*self._index["chunks"], pending]}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _flush(self) -> None:
+        if self._chunk is None:
+            return
+        self._chunk._flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._save_index({**self._entry, "bytes": self._raw.tell(), "complete": False})
+
+    def _finish(self) -> None:
+        if self._chunk is not None:
+            self._close_chunk()
+        elif not os.path.exists(self.path):
+            self._save_index()
+
+
+INDEX_SUFFIX = ".index.json"
+# Bytes read from the end of an export being appended to; far more than one record (4096 characters of text)
+_TAIL_BYTES = 256 * 1024
+_COMPRESSED_EXTENSIONS = {"gzip": "gz", "zstd": "zst"}
+
+
+def compression_method() -> str:
+    """The compression for new chunked exports: EXPORT_COMPRESSION, falling back to gzip without zstandard."""
+    if EXPORT_COMPRESSION == "zstd" and zstandard is not None:
+        return "zstd"
+    return "gzip"
+
+
+def _open_compressed(path: str, compression: str) -> Tuple[TextIO, BinaryIO]:
+    """Text stream compressing into a new file, and that file (its position is the compressed size)."""
+    raw = open(path, 'wb')
+    try:
+        if compression == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd compressed export needs the zstandard package")
+            binary = zstandard.ZstdCompressor(level=EXPORT_ZSTD_LEVEL).stream_writer(raw, closefd=False)
+        else:
+            binary = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=EXPORT_GZIP_LEVEL)
+        return io.TextIOWrapper(binary, encoding='utf-8'), raw
+    except Exception:
+        raw.close()
+        raise
+
+
+def chunks_for_range(index_path: str, since: Optional[str] = None, until: Optional[str] = None) -> List[str]:
+    """Chunk files of a chunked export holding messages dated between ``since`` and ``until``.
+
+    Args:
+        index_path: Index file of the export
+        since: Earliest date of interest (ISO 8601, as exported), or None
+        until: Latest date of interest (ISO 8601), or None
+
+    Returns:
+        Paths of the chunks whose date range overlaps, in export order. Chunks marked
+        ``"complete": false`` were cut short and end after their last flushed message
+    """
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    directory = os.path.dirname(index_path)
+    return [os.path.join(directory, chunk["file"]) for chunk in index["chunks"]
+            if chunk["messages"] and (since is None or chunk["dates"][1] >= since)
+            and (until is None or chunk["dates"][0] <= until)]
+
+
+def create_writer(format_type: str, path: str, chat_id: int, chat_name: str, append: bool = False,
+                  compress: bool = False) -> ExportWriter:
+    """Writer for an export format ("json", "jsonl", "txt" or "sqlite").
+
+    With ``append`` the messages are added to the export at ``path``; the
+    SQLite database is always merged into. With ``compress`` a file format is
+    written as compressed chunks and ``path`` names their index file.
+    """
+    if format_type == "sqlite":
+        return SqliteExportWriter(path, chat_id, chat_name)
+    if compress:
+        return ChunkedExportWriter(path, format_type, append)
+    writer = FILE_WRITERS.get(format_type)
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {format_type}")
+    return writer(path, append)
@@ -1,9 +1,9 @@
 import json
 import os.path
 from typing import List, Optional
-import re
 
 from source.model.Chat import Chat
+from source.model.KeywordFilter import compile_keywords
 from source.utils.Constants import FORWARD_CONFIG_FILE_PATH
 from source.dialog.BaseDialog import BaseDialog
 
@@ -12,7 +12,8 @@ class ForwardConfig:
 
     def __init__(self, *args, include_keywords: Optional[List[str]] = None, exclude_keywords: Optional[List[str]] = None,
                  deduplicate: bool = True, dedup_ttl_seconds: int = 3600,
-                 rate_limit_enabled: bool = False, min_interval_seconds: float = 1.0, **kwargs):
+                 rate_limit_enabled: bool = False, min_interval_seconds: float = 1.0,
+                 near_duplicate: bool = False, near_duplicate_distance: int = 3, **kwargs):
         self.sourceID = None
         self.sourceName = None
         self.destinationID = None
@@ -25,6 +26,10 @@ class ForwardConfig:
         self.deduplicate = deduplicate
         # TTL (seconds) consider dup message
         self.dedup_ttl_seconds = dedup_ttl_seconds
+        # also skip texts that differ only slightly (emoji, tracking parameters) from one
+        # forwarded within dedup_ttl_seconds: SimHash signatures at most this many bits apart
+        self.near_duplicate = near_duplicate
+        self.near_duplicate_distance = near_duplicate_distance
 
         # Rate limiting settings (disabled by default)
         # If enabled, the forward service will wait at least min_interval_seconds
@@ -81,16 +86,9 @@ class ForwardConfig:
     def __repr__(self):
         return f'sourceName= "{self.sourceName}", destinationName= "{self.destinationName}"'
 
-    # simple utility for test/regex
+    # regex search (case-insensitive) per keyword; invalid regexes are searched as plain text.
+    # the keyword list is compiled once into a KeywordFilter and reused for every message
     def _matches_any(self, text: str, patterns: List[str]) -> bool:
         if not patterns:
             return False
-        for p in patterns:
-            try:
-                if re.search(p, text, re.IGNORECASE):
-                    return True
-            except re.error:
-                # if not regex working, search
-                if p.lower() in text.lower():
-                    return True
-        return False
+        return compile_keywords(tuple(patterns)).matches(text)
@@ -1,42 +1,374 @@
+import bisect
 import json
-from source.utils.Constants import HISTORY_FILE_PATH
+import mmap
+import os
+import struct
+from array import array
+from source.utils.Constants import (HISTORY_FILE_PATH, HISTORY_INDEX_FILE_PATH, HISTORY_JOURNAL_FILE_PATH,
+                                    HISTORY_COMPACT_INTERVAL)
+
+# Snapshot layout (little endian):
+#   header    : magic, pair count
+#   directory : one (source chat, destination chat, data offset, row count) entry per pair
+#   data      : per pair, a sorted int64 column of source message ids followed by the
+#               int64 column of the matching destination message ids, then the same
+#               mappings sorted by destination message id (destination, source columns)
+# Version 1 snapshots lack the reverse columns and are rewritten on load.
+_MAGIC = b"FWDHIST2"
+_MAGIC_V1 = b"FWDHIST1"
+_HEADER = struct.Struct("<8sQ")
+_ENTRY = struct.Struct("<qqQQ")
+_ITEM_SIZE = array("q").itemsize
+# Telegram message ids start at 1, so 0 marks a removed mapping
+_REMOVED = 0
+
+
+class _PairIndex:
+    """Sorted message-id columns for a single (source chat, destination chat) pair.
+
+    ``base_source``/``base_dest`` are read-only views into the memory-mapped snapshot,
+    ``source_ids``/``dest_ids`` hold mappings added since then. Both are kept sorted
+    by source message id and searched with bisect; the in-memory overlay wins.
+    A destination id of ``_REMOVED`` is a tombstone for a deleted mapping.
+
+    The reverse (destination -> source) direction uses the same layout: the overlay
+    columns are maintained on every put, the snapshot columns are written sorted by
+    destination id at compaction. Reverse hits are confirmed against the forward
+    columns, so stale reverse entries left by overwrites never leak out.
+    """
+
+    __slots__ = ("base_source", "base_dest", "source_ids", "dest_ids",
+                 "base_reverse_dest", "base_reverse_source", "reverse_dest", "reverse_source")
+
+    def __init__(self, base_source=None, base_dest=None, base_reverse_dest=None, base_reverse_source=None):
+        self.base_source = base_source
+        self.base_dest = base_dest
+        self.source_ids = array("q")
+        self.dest_ids = array("q")
+        self.base_reverse_dest = base_reverse_dest
+        self.base_reverse_source = base_reverse_source
+        self.reverse_dest = array("q")
+        self.reverse_source = array("q")
+
+    @staticmethod
+    def _find(keys, values, key):
+        if keys is None:
+            return None
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return values[i]
+        return None
+
+    @staticmethod
+    def _insert(keys, values, key, value):
+        # Forwarded ids almost always grow, which keeps this an O(1) append
+        if not keys or key > keys[-1]:
+            keys.append(key)
+            values.append(value)
+            return
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            values[i] = value
+        else:
+            keys.insert(i, key)
+            values.insert(i, value)
+
+    def get(self, source_msg_id):
+        dest_msg_id = self._find(self.source_ids, self.dest_ids, source_msg_id)
+        if dest_msg_id is None:
+            dest_msg_id = self._find(self.base_source, self.base_dest, source_msg_id)
+        return None if dest_msg_id == _REMOVED else dest_msg_id
+
+    def get_source(self, dest_msg_id):
+        source_msg_id = self._find(self.reverse_dest, self.reverse_source, dest_msg_id)
+        if source_msg_id is None:
+            source_msg_id = self._find(self.base_reverse_dest, self.base_reverse_source, dest_msg_id)
+        if source_msg_id is None or self.get(source_msg_id) != dest_msg_id:
+            return None
+        return source_msg_id
+
+    def put(self, source_msg_id, dest_msg_id):
+        self._insert(self.source_ids, self.dest_ids, source_msg_id, dest_msg_id)
+        if dest_msg_id != _REMOVED:
+            self._insert(self.reverse_dest, self.reverse_source, dest_msg_id, source_msg_id)
+
+    def merged(self):
+        """Returns the base and overlay merged into fresh ``(source_ids, dest_ids)`` arrays."""
+        base_source, base_dest = self.base_source, self.base_dest
+        if base_source is None or not len(base_source):
+            return self._drop_removed(array("q", self.source_ids), array("q", self.dest_ids))
+        source_ids, dest_ids = array("q", base_source), array("q", base_dest)
+        if not self.source_ids:
+            return source_ids, dest_ids
+        if self.source_ids[0] > source_ids[-1]:
+            source_ids.extend(self.source_ids)
+            dest_ids.extend(self.dest_ids)
+            return self._drop_removed(source_ids, dest_ids)
+
+        merged_source, merged_dest = array("q"), array("q")
+        i = j = 0
+        while i < len(source_ids) and j < len(self.source_ids):
+            if source_ids[i] < self.source_ids[j]:
+                merged_source.append(source_ids[i])
+                merged_dest.append(dest_ids[i])
+                i += 1
+            else:
+                if source_ids[i] == self.source_ids[j]:
+                    i += 1
+                merged_source.append(self.source_ids[j])
+                merged_dest.append(self.dest_ids[j])
+                j += 1
+        merged_source.extend(source_ids[i:])
+        merged_dest.extend(dest_ids[i:])
+        merged_source.extend(self.source_ids[j:])
+        merged_dest.extend(self.dest_ids[j:])
+        return self._drop_removed(merged_source, merged_dest)
+
+    @staticmethod
+    def reversed_columns(source_ids, dest_ids):
+        """Returns the mappings as ``(dest_ids, source_ids)`` arrays sorted by destination id."""
+        # Copies are sent in source order, so the destination column is usually sorted already
+        if all(dest_ids[i] < dest_ids[i + 1] for i in range(len(dest_ids) - 1)):
+            return array("q", dest_ids), array("q", source_ids)
+        rows = sorted(zip(dest_ids, source_ids))
+        return array("q", (dest for dest, _ in rows)), array("q", (source for _, source in rows))
+
+    @staticmethod
+    def _drop_removed(source_ids, dest_ids):
+        if _REMOVED not in dest_ids:
+            return source_ids, dest_ids
+        kept = [i for i, dest_msg_id in enumerate(dest_ids) if dest_msg_id != _REMOVED]
+        return array("q", (source_ids[i] for i in kept)), array("q", (dest_ids[i] for i in kept))
+
 
 class History:
-    def __init__(self):
-        self.message_map = self.load_data()
-
-    def convert_to_json_format(self, data):
-        return [
-            {
-                "source": {"id": source_id, "message_id": source_msg_id},
-                "destination": {"id": dest_id, "message_id": dest_msg_id}
-            }
-            for (source_id, source_msg_id, dest_id), dest_msg_id in data.items()
-        ]
-
-    def convert_from_json_format(self, json_data):
-        return {
-            (item["source"]["id"], item["source"]["message_id"], item["destination"]["id"]):
-                item["destination"]["message_id"]
-            for item in json_data
-        }
-
-    def save_data(self, data):
-        json_data = self.convert_to_json_format(data)
-        with open(HISTORY_FILE_PATH, 'w') as file:
-            json.dump(json_data, file, indent=4)
+    """Compact message mapping store shared by all forwarding components.
+
+    Mappings are grouped per (source chat, destination chat) pair into sorted int64
+    columns. The snapshot is a binary file that is memory-mapped on open, so even
+    millions of mappings open instantly and are paged in on demand. New mappings
+    are appended to a journal (O(1) per write) and kept in a small in-memory
+    overlay until ``compact_interval`` entries have accumulated, at which point
+    they are merged into a new snapshot. A torn journal tail left by a crash is
+    discarded on load. A legacy ``history.json`` is imported once if no snapshot
+    exists yet. Pairs are also indexed by destination chat, so a reverse lookup
+    only visits the sources copied into that chat.
+    """
+
+    def __init__(self, path=HISTORY_INDEX_FILE_PATH, journal_path=HISTORY_JOURNAL_FILE_PATH,
+                 compact_interval=HISTORY_COMPACT_INTERVAL, legacy_path=HISTORY_FILE_PATH):
+        self.path = path
+        self.journal_path = journal_path
+        self.legacy_path = legacy_path
+        self.compact_interval = compact_interval
+        self._journal = None
+        self._journal_entries = 0
+        self._mmap = None
+        self._views = []
+        self._pairs = {}
+        self._pairs_by_dest = {}
+        self.load_data()
 
     def load_data(self):
+        needs_compaction = False
+        if os.path.exists(self.path):
+            needs_compaction = self._map_snapshot() == _MAGIC_V1
+        elif self.legacy_path and os.path.exists(self.legacy_path):
+            needs_compaction = self._import_legacy()
+        self._replay_journal()
+        if needs_compaction:
+            self.compact()
+
+    def _import_legacy(self):
         try:
-            with open(HISTORY_FILE_PATH, 'r') as file:
+            with open(self.legacy_path, 'r') as file:
                 json_data = json.load(file)
-                return self.convert_from_json_format(json_data)
         except Exception:
-            return {}
+            return False
+        for item in json_data:
+            self._pair(item["source"]["id"], item["destination"]["id"]).put(
+                item["source"]["message_id"], item["destination"]["message_id"])
+        return bool(json_data)
+
+    def _map_snapshot(self):
+        """Maps the snapshot and returns its magic, or None if the file is empty."""
+        with open(self.path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < _HEADER.size:
+                return None
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, pair_count = _HEADER.unpack_from(self._mmap, 0)
+        if magic not in (_MAGIC, _MAGIC_V1):
+            raise ValueError(f"{self.path} is not a message history snapshot")
+        columns = 4 if magic == _MAGIC else 2
+        buffer = memoryview(self._mmap)
+        self._views.append(buffer)
+        for n in range(pair_count):
+            source_id, dest_id, offset, count = _ENTRY.unpack_from(self._mmap, _HEADER.size + n * _ENTRY.size)
+            column_size = count * _ITEM_SIZE
+            views = [buffer[offset + i * column_size:offset + (i + 1) * column_size].cast("q")
+                     for i in range(columns)]
+            self._views.extend(views)
+            self._add_pair(source_id, dest_id, _PairIndex(*views))
+        return magic
+
+    def _unmap_snapshot(self):
+        for pair in self._pairs.values():
+            pair.base_source = pair.base_dest = None
+            pair.base_reverse_dest = pair.base_reverse_source = None
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def save_data(self, columns):
+        """Atomically writes ``{(source_id, dest_id): (source_ids, dest_ids)}`` as the new snapshot."""
+        os.replace(self._write_snapshot(columns), self.path)
+
+    def _write_snapshot(self, columns):
+        """Writes a snapshot of ``columns`` next to the current one and returns its path."""
+        tmp_path = f"{self.path}.tmp"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, len(columns)))
+            offset = _HEADER.size + len(columns) * _ENTRY.size
+            for (source_id, dest_id), (source_ids, _) in columns.items():
+                file.write(_ENTRY.pack(source_id, dest_id, offset, len(source_ids)))
+                offset += 4 * len(source_ids) * _ITEM_SIZE
+            for source_ids, dest_ids in columns.values():
+                file.write(source_ids.tobytes())
+                file.write(dest_ids.tobytes())
+                for column in _PairIndex.reversed_columns(source_ids, dest_ids):
+                    file.write(column.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        return tmp_path
+
+    def _replay_journal(self):
+        """Applies journal entries to the overlay and cuts off a torn tail, if any."""
+        if not os.path.exists(self.journal_path):
+            return
+        valid_size = 0
+        with open(self.journal_path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    source_id, source_msg_id, dest_id, dest_msg_id = json.loads(line)
+                except ValueError:
+                    break
+                self._pair(source_id, dest_id).put(source_msg_id, dest_msg_id)
+                valid_size += len(line)
+                self._journal_entries += 1
+        if valid_size < os.path.getsize(self.journal_path):
+            with open(self.journal_path, 'r+b') as file:
+                file.truncate(valid_size)
+
+    def _open_journal(self):
+        if self._journal is None:
+            directory = os.path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        return self._journal
+
+    def _pair(self, source_id, dest_id):
+        pair = self._pairs.get((source_id, dest_id))
+        if pair is None:
+            pair = self._add_pair(source_id, dest_id, _PairIndex())
+        return pair
+
+    def _add_pair(self, source_id, dest_id, pair):
+        self._pairs[(source_id, dest_id)] = pair
+        self._pairs_by_dest.setdefault(dest_id, []).append((source_id, pair))
+        return pair
+
+    def compact(self):
+        """Merges the overlay into a new snapshot and truncates the journal.
+
+        The snapshot is replaced before the journal is truncated, so a crash in
+        between only causes already applied entries to be replayed again. The
+        in-memory mappings are only dropped once the new snapshot is in place; if
+        writing it fails, they stay served from memory and the journal is kept.
+        """
+        columns = {key: pair.merged() for key, pair in self._pairs.items()}
+        tmp_path = self._write_snapshot(columns)
+        # The old mapping must be released before the file can be replaced on Windows
+        self._unmap_snapshot()
+        try:
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The merged columns hold every mapping; serve them until the next attempt
+            for key, (source_ids, dest_ids) in columns.items():
+                pair = self._pairs[key]
+                pair.base_source, pair.base_dest = source_ids, dest_ids
+                pair.base_reverse_dest, pair.base_reverse_source = _PairIndex.reversed_columns(source_ids, dest_ids)
+            raise
+        self._pairs = {}
+        self._pairs_by_dest = {}
+        del columns
+        self._map_snapshot()
+        journal = self._open_journal()
+        journal.seek(0)
+        journal.truncate()
+        self._journal_entries = 0
+
+    def close(self):
+        if self._journal_entries:
+            self.compact()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._unmap_snapshot()
+        self._pairs = {}
+        self._pairs_by_dest = {}
 
     def add_mapping(self, source_id, source_msg_id, dest_id, dest_msg_id):
-        self.message_map[(source_id, source_msg_id, dest_id)] = dest_msg_id
-        self.save_data(self.message_map)
+        self._pair(source_id, dest_id).put(source_msg_id, dest_msg_id)
+        journal = self._open_journal()
+        journal.write(json.dumps([source_id, source_msg_id, dest_id, dest_msg_id]) + '\n')
+        journal.flush()
+        self._journal_entries += 1
+        if self._journal_entries >= self.compact_interval:
+            self.compact()
+
+    def add_mappings(self, mappings):
+        """Adds several ``(source_id, source_msg_id, dest_id, dest_msg_id)`` mappings with one journal write."""
+        lines = []
+        for source_id, source_msg_id, dest_id, dest_msg_id in mappings:
+            self._pair(source_id, dest_id).put(source_msg_id, dest_msg_id)
+            lines.append(json.dumps([source_id, source_msg_id, dest_id, dest_msg_id]) + '\n')
+        if not lines:
+            return
+        journal = self._open_journal()
+        journal.write(''.join(lines))
+        journal.flush()
+        self._journal_entries += len(lines)
+        if self._journal_entries >= self.compact_interval:
+            self.compact()
+
+    def remove_mapping(self, source_id, source_msg_id, dest_id):
+        if self.get_mapping(source_id, source_msg_id, dest_id) is not None:
+            self.add_mapping(source_id, source_msg_id, dest_id, _REMOVED)
 
     def get_mapping(self, source_id, source_msg_id, dest_id):
-        return self.message_map.get((source_id, source_msg_id, dest_id))
\ No newline at end of file
+        pair = self._pairs.get((source_id, dest_id))
+        return pair.get(source_msg_id) if pair is not None else None
+
+    def get_source_mapping(self, dest_id, dest_msg_id):
+        """Returns ``(source_id, source_msg_id)`` of the message copied to ``dest_msg_id``, if any."""
+        for source_id, pair in self._pairs_by_dest.get(dest_id, ()):
+            source_msg_id = pair.get_source(dest_msg_id)
+            if source_msg_id is not None:
+                return source_id, source_msg_id
+        return None
+
+    def items(self):
+        """Yields every mapping as ``((source_id, source_msg_id, dest_id), dest_msg_id)``."""
+        for (source_id, dest_id), pair in self._pairs.items():
+            source_ids, dest_ids = pair.merged()
+            for source_msg_id, dest_msg_id in zip(source_ids, dest_ids):
+                yield (source_id, source_msg_id, dest_id), dest_msg_id
@@ -0,0 +1,134 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Characters that make a keyword a regular expression rather than a plain word
+_REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+# Characters for which str.lower() and re.IGNORECASE disagree about ASCII letters:
+# "ı" and "ſ" match "i"/"s" case-insensitively, and "İ" lowers to two characters.
+# Mapping them first makes text.lower() agree with re.IGNORECASE for ASCII keywords
+_CASE_FOLDING_EXCEPTIONS = frozenset("İıſ")
+_ASCII_CASE_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+
+# Output kinds of automaton states
+_LOWER_LITERAL = 1  # keyword that is not a valid regex, matched on text.lower() like before
+_ASCII_LITERAL = 2  # plain ASCII keyword, equivalent to its case-insensitive regex
+
+
+class AhoCorasick:
+    """Multi-pattern substring automaton answering "does any keyword occur in the text".
+
+    The trie and its failure links are flattened into a DFA (one dict of
+    character -> next state per state), so a text is scanned once with a single
+    lookup per character, regardless of the number of keywords.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[int] = [0]
+        for keyword, kind in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._output.append(0)
+                state = next_state
+            self._output[state] |= kind
+        self._delta = self._build_transitions()
+
+    def _build_transitions(self) -> List[Dict[str, int]]:
+        """Resolve failure links breadth-first into complete per-state transitions."""
+        fail = [0] * len(self._goto)
+        delta: List[Dict[str, int]] = [{} for _ in self._goto]
+        delta[0] = dict(self._goto[0])
+        queue = list(self._goto[0].values())
+        for state in queue:
+            # Characters without an own edge continue where the failure state would go
+            delta[state] = {**delta[fail[state]], **self._goto[state]}
+            self._output[state] |= self._output[fail[state]]
+            for char, next_state in self._goto[state].items():
+                fail[next_state] = delta[fail[state]].get(char, 0) if state else 0
+                queue.append(next_state)
+        return delta
+
+    def search(self, text: str, kinds: int) -> bool:
+        """Whether a keyword of one of ``kinds`` occurs in ``text``."""
+        if self._output[0] & kinds:
+            return True
+        delta, output = self._delta, self._output
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if output[state] & kinds:
+                return True
+        return False
+
+
+class KeywordFilter:
+    """Include/exclude keyword list compiled for fast matching.
+
+    Gives the same answer as testing every keyword with
+    ``re.search(keyword, text, re.IGNORECASE)`` and falling back to a
+    case-insensitive substring test for keywords that are not valid regexes:
+
+    - plain keywords and invalid regexes go into one Aho–Corasick automaton run
+      over the lower-cased text;
+    - the other regexes are combined into a single alternation;
+    - regexes whose meaning depends on their own group numbers or inline flags
+      (backreferences, named groups, global flags) are kept separate.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        literals: List[Tuple[str, int]] = []
+        combinable: List[str] = []
+        self._separate: List[re.Pattern] = []
+        for pattern in patterns:
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except re.error:
+                literals.append((pattern.lower(), _LOWER_LITERAL))
+                continue
+            if pattern.isascii() and not _REGEX_METACHARACTERS.intersection(pattern):
+                literals.append((pattern.lower(), _ASCII_LITERAL))
+            elif compiled.groups and (compiled.groupindex or re.search(r"\\\d|\(\?P=|\(\?\(", pattern)):
+                self._separate.append(compiled)
+            elif re.search(r"\(\?[aiLmsux]+\)", pattern):
+                self._separate.append(compiled)
+            else:
+                combinable.append(pattern)
+
+        self._automaton: Optional[AhoCorasick] = AhoCorasick(literals) if literals else None
+        self._combined = self._compile_alternation(combinable)
+
+    def _compile_alternation(self, patterns: List[str]) -> Optional[re.Pattern]:
+        if not patterns:
+            return None
+        try:
+            return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+        except re.error:
+            self._separate.extend(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+            return None
+
+    def matches(self, text: str) -> bool:
+        """Whether any keyword matches ``text``."""
+        if self._automaton is not None:
+            lowered = text.lower()
+            if _CASE_FOLDING_EXCEPTIONS.isdisjoint(text):
+                if self._automaton.search(lowered, _LOWER_LITERAL | _ASCII_LITERAL):
+                    return True
+            elif (self._automaton.search(lowered, _LOWER_LITERAL)
+                  or self._automaton.search(text.translate(_ASCII_CASE_FOLD).lower(), _ASCII_LITERAL)):
+                return True
+        if self._combined is not None and self._combined.search(text):
+            return True
+        return any(compiled.search(text) for compiled in self._separate)
+
+
+@lru_cache(maxsize=256)
+def compile_keywords(patterns: Tuple[str, ...]) -> KeywordFilter:
+    """Compiled filter for a keyword list, built once per distinct list."""
+    return KeywordFilter(patterns)
@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from source.model.ForwardConfig import ForwardConfig
+
+
+class RoutingTable:
+    """Compiled routes from source chats to their destination chats.
+
+    Built once from the forward configs, so a source can be routed to any number
+    of destinations. Each source maps to a tuple of its configs, one per distinct
+    destination, in configuration order; lookups are plain dict accesses.
+
+    Attributes:
+        sources (list): Source chat IDs, in configuration order
+        all_destinations (frozenset): Every destination chat ID of any source
+    """
+
+    def __init__(self, forward_configs: Iterable[ForwardConfig]):
+        routes: Dict[int, List[ForwardConfig]] = {}
+        for config in forward_configs:
+            configs = routes.setdefault(config.sourceID, [])
+            if all(existing.destinationID != config.destinationID for existing in configs):
+                configs.append(config)
+
+        self._configs: Dict[int, Tuple[ForwardConfig, ...]] = {
+            source: tuple(configs) for source, configs in routes.items()
+        }
+        self._destinations: Dict[int, Tuple[int, ...]] = {
+            source: tuple(config.destinationID for config in configs) for source, configs in routes.items()
+        }
+        self._config_of_pair: Dict[Tuple[int, int], ForwardConfig] = {
+            (source, config.destinationID): config for source, configs in routes.items() for config in configs
+        }
+        self.sources = list(self._configs)
+        self.all_destinations = frozenset(
+            destination for destinations in self._destinations.values() for destination in destinations
+        )
+
+    def __contains__(self, source_id: int) -> bool:
+        return source_id in self._configs
+
+    def __iter__(self):
+        return iter(self.sources)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def configs(self, source_id: int) -> Tuple[ForwardConfig, ...]:
+        """Forward configs of a source, one per destination (empty if not routed)."""
+        return self._configs.get(source_id, ())
+
+    def config(self, source_id: int, destination_id: int) -> Optional[ForwardConfig]:
+        """Forward config routing a source to a destination, or None."""
+        return self._config_of_pair.get((source_id, destination_id))
+
+    def destinations(self, source_id: int) -> Tuple[int, ...]:
+        """Destination chat IDs of a source (empty if not routed)."""
+        return self._destinations.get(source_id, ())
+
+    def lanes(self) -> List[List[int]]:
+        """Group sources that share a destination, directly or through other sources.
+
+        Sources in different lanes never write to the same destination, so lanes
+        can be processed concurrently while each lane stays serial.
+
+        Returns:
+            Lists of source chat IDs, each in configuration order
+        """
+        lane_of_destination: Dict[int, int] = {}
+        lanes: List[List[int]] = []
+        for source in self.sources:
+            joined = sorted({lane_of_destination[d] for d in self.destinations(source) if d in lane_of_destination})
+            if joined:
+                target = joined[0]
+                for other in joined[1:]:
+                    lanes[target].extend(lanes[other])
+                    lanes[other] = []
+                lanes[target].append(source)
+            else:
+                target = len(lanes)
+                lanes.append([source])
+            for lane_source in lanes[target]:
+                for destination in self.destinations(lane_source):
+                    lane_of_destination[destination] = target
+
+        order = {source: i for i, source in enumerate(self.sources)}
+        return [sorted(lane, key=order.get) for lane in lanes if lane]
+
+    def __repr__(self):
+        return f"RoutingTable({self._destinations})"
@@ -0,0 +1,144 @@
+import heapq
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from source.utils.Constants import DEDUP_MAX_ENTRIES, DEDUP_RETENTION_SECONDS, NEAR_DUPLICATE_MIN_FEATURES
+
+_BITS = 64
+_MASK = (1 << _BITS) - 1
+# Every signature bit gets its own 16-bit lane in one big integer, so the per-bit
+# votes of all features are summed with plain integer additions
+_LANE = 16
+_LANE_TOP = 1 << (_LANE - 1)
+_LANE_ONES = sum(1 << (i * _LANE) for i in range(_BITS))
+_LANE_TOPS = _LANE_TOP * _LANE_ONES
+# _SPREAD[i][byte]: the 8 bits of ``byte``, as byte ``i`` of a signature, spread onto their lanes
+_SPREAD = [[sum(((byte >> bit) & 1) << ((i * 8 + bit) * _LANE) for bit in range(8)) for byte in range(256)]
+           for i in range(_BITS // 8)]
+_BIT_CHARS = bytes.maketrans(b"\x00\x01", b"01")
+
+_URL_TAIL = re.compile(r"(https?://[^\s?#]+)[?#]\S*")
+_WORD = re.compile(r"\w+")
+
+
+def _features(text: str) -> Counter:
+    """Words and word pairs of ``text``, ignoring case, punctuation, emoji and URL query strings."""
+    words = _WORD.findall(_URL_TAIL.sub(r"\1", text.lower()))
+    features = Counter(words)
+    features.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return features
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of a text, or None if it is too short to compare reliably.
+
+    Feature hashes come from Python's ``hash``, so signatures are only
+    comparable within one process, which is all the in-memory index needs.
+    """
+    features = _features(text)
+    total = sum(features.values())
+    if total < NEAR_DUPLICATE_MIN_FEATURES:
+        return None
+
+    s0, s1, s2, s3, s4, s5, s6, s7 = _SPREAD
+    lanes = 0
+    for feature, weight in features.items():
+        v = hash(feature)
+        spread = (s0[v & 255] | s1[(v >> 8) & 255] | s2[(v >> 16) & 255] | s3[(v >> 24) & 255]
+                  | s4[(v >> 32) & 255] | s5[(v >> 40) & 255] | s6[(v >> 48) & 255] | s7[(v >> 56) & 255])
+        lanes += spread if weight == 1 else spread * weight
+
+    # A bit is set when more than half of the feature weight votes for it: biasing every
+    # lane by (_LANE_TOP - threshold) moves exactly those lanes onto their top bit.
+    # Telegram texts (4096 characters at most) stay far below the 2**15 lane capacity
+    threshold = total // 2 + 1
+    tops = ((lanes + (_LANE_TOP - threshold) * _LANE_ONES) & _LANE_TOPS) >> (_LANE - 1)
+    bits = tops.to_bytes(_BITS * _LANE // 8, "little")[::_LANE // 8]
+    return int(bits[::-1].translate(_BIT_CHARS), 2)
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+
+class SimHashIndex:
+    """SimHash signatures of recent messages, searchable by Hamming distance.
+
+    Signatures are split into ``max_distance + 1`` bands. Two signatures at most
+    ``max_distance`` bits apart agree on at least one whole band, so a lookup
+    only compares against signatures that share a band value instead of
+    scanning the whole window. Like in ``DedupStore``, every signature carries
+    its own window of message times (checked per lookup), while removal follows
+    wall-clock retention and the ``max_entries`` bound: a min-heap of retention
+    expiries, stale heap entries skipped.
+    """
+
+    def __init__(self, max_distance: int = 3, max_entries: int = DEDUP_MAX_ENTRIES,
+                 retention: float = DEDUP_RETENTION_SECONDS):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.retention = retention
+        bands = min(_BITS, max_distance + 1)
+        edges = [round(i * _BITS / bands) for i in range(bands + 1)]
+        self._bands = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in self._bands]
+        # signature -> (window start, window end, retention expiry)
+        self._entries: Dict[int, Tuple[float, float, float]] = {}
+        self._heap: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, signature: int):
+        return [(signature >> start) & mask for start, mask in self._bands]
+
+    def find(self, signature: int, at: Optional[float] = None) -> Optional[int]:
+        """A signature within ``max_distance`` bits of ``signature`` whose window covers ``at`` (default: now)."""
+        now = time.time()
+        self._expire(now)
+        at = now if at is None else at
+        for table, key in zip(self._tables, self._keys(signature)):
+            for candidate in table.get(key, ()):
+                start, end, _ = self._entries[candidate]
+                if start <= at < end and hamming_distance(candidate, signature) <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, signature: int, ttl: float, at: Optional[float] = None) -> None:
+        """Keep ``signature`` searchable for messages posted within ``ttl`` seconds from ``at`` (default: now)."""
+        now = time.time()
+        start = now if at is None else at
+        end = start + ttl
+        previous = self._entries.get(signature)
+        if previous is None:
+            for table, key in zip(self._tables, self._keys(signature)):
+                table.setdefault(key, set()).add(signature)
+        elif previous[0] <= end and start <= previous[1]:
+            start, end = min(start, previous[0]), max(end, previous[1])
+        expiry = now + max(ttl, self.retention)
+        self._entries[signature] = (start, end, expiry)
+        heapq.heappush(self._heap, (expiry, signature))
+        self._expire(now)
+        while len(self._entries) > self.max_entries:
+            self._pop()
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._heap = [(entry[2], signature) for signature, entry in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _pop(self) -> None:
+        expiry, signature = heapq.heappop(self._heap)
+        entry = self._entries.get(signature)
+        if entry is None or entry[2] != expiry:
+            return
+        del self._entries[signature]
+        for table, key in zip(self._tables, self._keys(signature)):
+            bucket = table[key]
+            bucket.discard(signature)
+            if not bucket:
+                del table[key]
+
+    def _expire(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            self._pop()
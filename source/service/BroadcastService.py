@@ -1,11 +1,12 @@
-import asyncio
 from telethon import TelegramClient
 from source.utils.Console import Terminal
 from source.model.Chat import Chat
+from source.service.RateLimiter import RateLimiter
 
 class BroadcastService:
     def __init__(self, client: TelegramClient):
         self.client = client
+        self.rate_limiter = RateLimiter.for_client(client)
         self.console = Terminal.console
 
     async def send_broadcast(self, chats: list[Chat], message_text: str):
@@ -22,10 +23,9 @@ class BroadcastService:
         for chat in chats:
             try:
                 self.console.print(f"Sending to [blue]{chat.title}[/blue]...")
-                await self.client.send_message(chat.id, message_text)
+                # Paced by the shared rate limiter, which also waits out flood limits
+                await self.rate_limiter.call("send", self.client.send_message, chat.id, message_text, peer=chat.id)
                 success_count += 1
-                # Small delay to avoid flood limits
-                await asyncio.sleep(1) 
             except Exception as e:
                 self.console.print(f"[red]Failed to send to {chat.title}: {e}[/red]")
                 fail_count += 1
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Callable
+
+from telethon import TelegramClient
+
+from source.service.RateLimiter import RateLimiter
+from source.utils.Constants import DELETE_BATCH_SIZE, DELETE_BATCH_DELAY
+
+logger = logging.getLogger(__name__)
+
+
+class DeleteBatcher:
+    """Coalesces message deletions into one ``delete_messages`` call per destination.
+
+    Deletions usually arrive in bursts (an admin clearing a thread, a purge bot).
+    Instead of one request per message, ids are collected per destination chat for
+    up to ``delay`` seconds and then deleted in chunks of at most ``batch_size``.
+    A destination whose queue reaches ``batch_size`` is flushed right away.
+
+    Attributes:
+        client (TelegramClient): The Telegram client instance
+        on_deleted (Callable): Optional callback ``(destination_id, message_ids)`` run after each request
+    """
+
+    def __init__(self, client: TelegramClient, on_deleted: Optional[Callable[[int, List[int]], None]] = None,
+                 batch_size: int = DELETE_BATCH_SIZE, delay: float = DELETE_BATCH_DELAY):
+        self.client = client
+        self.rate_limiter = RateLimiter.for_client(client)
+        self.on_deleted = on_deleted
+        self.batch_size = batch_size
+        self.delay = delay
+        self._pending: Dict[int, List[int]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def add(self, destination_id: int, message_ids: List[int]) -> None:
+        """Queue messages of a destination chat for deletion.
+
+        Args:
+            destination_id: Destination chat ID
+            message_ids: IDs of the destination messages to delete
+        """
+        pending = self._pending.setdefault(destination_id, [])
+        pending.extend(message_ids)
+        if len(pending) >= self.batch_size:
+            await self._flush_destination(destination_id)
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """Delete everything queued so far."""
+        for destination_id in list(self._pending):
+            await self._flush_destination(destination_id)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.delay)
+        await self.flush()
+
+    async def _flush_destination(self, destination_id: int) -> None:
+        message_ids = self._pending.pop(destination_id, [])
+        for start in range(0, len(message_ids), self.batch_size):
+            chunk = message_ids[start:start + self.batch_size]
+            try:
+                await self.rate_limiter.call("delete", self.client.delete_messages, destination_id, chunk,
+                                             peer=destination_id)
+                if self.on_deleted:
+                    self.on_deleted(destination_id, chunk)
+            except Exception as e:
+                logger.error(f"Error deleting {len(chunk)} messages in {destination_id}: {e}")
@@ -1,62 +1,228 @@
 import os
 import json
+import time
+import asyncio
 import datetime
+from typing import Callable, List, Optional
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
 from telethon import TelegramClient
 from telethon.tl.types import User, Chat, Channel
-from source.utils.Constants import EXPORT_FOLDER_PATH
+from source.utils.Constants import EXPORT_FOLDER_PATH, EXPORT_DATABASE_FILE_PATH, EXPORT_CONCURRENCY
+from source.model.ExportWriter import create_writer, INDEX_SUFFIX
+from source.model.ExportState import ExportState
 from source.utils.Console import Terminal
+from source.service.RateLimiter import RateLimiter
 
 class ExportService:
     def __init__(self, client: TelegramClient):
         self.client = client
+        self.rate_limiter = RateLimiter.for_client(client)
+        self.export_state = ExportState()
         self.console = Terminal.console
 
-    async def export_chat(self, chat_id: int, format_type: str = 'json', limit: int = None):
-        """Exports chat history to a file."""
-        try:
-            chat = await self.client.get_entity(chat_id)
-            chat_name = getattr(chat, 'title', getattr(chat, 'username', str(chat_id))) or str(chat_id)
-            
-            # Sanitize filename
-            safe_name = "".join([c for c in chat_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            os.makedirs(EXPORT_FOLDER_PATH, exist_ok=True)
-            
-            filename = f"{EXPORT_FOLDER_PATH}/{safe_name}_{timestamp}.{format_type}"
-            
-            messages = []
-            self.console.print(f"[cyan]Starting export for {chat_name}...[/cyan]")
-            
-            count = 0
-            async for message in self.client.iter_messages(chat, limit=limit):
-                msg_data = {
-                    "id": message.id,
-                    "date": message.date.isoformat(),
-                    "sender_id": message.sender_id,
-                    "text": message.text,
-                    "reply_to_msg_id": message.reply_to_msg_id,
-                    "media": bool(message.media)
-                }
-                messages.append(msg_data)
-                count += 1
-                if count % 100 == 0:
-                    print(f"Fetched {count} messages...", end='\r')
-
-            if format_type == 'json':
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(messages, f, ensure_ascii=False, indent=4)
-            elif format_type == 'txt':
-                with open(filename, 'w', encoding='utf-8') as f:
-                    for msg in messages:
-                        sender = msg['sender_id'] or "Unknown"
-                        date = msg['date']
-                        text = msg['text'] or "[Media/Empty]"
-                        f.write(f"[{date}] {sender}: {text}\n")
-            
-            self.console.print(f"\n[bold green]Export completed! saved to {filename}[/bold green]")
-            return filename
+    async def export_chat(self, chat_id: int, format_type: str = 'json', limit: int = None,
+                          incremental: bool = False, compress: bool = False):
+        """Exports chat history to a file (json, jsonl or txt) or the shared SQLite database (sqlite),
+        writing messages as they are fetched.
+
+        An incremental export only fetches messages newer than the highest one
+        exported before in the same format, oldest first, and appends them to
+        that archive. The first incremental export of a chat fetches everything.
 
+        A compressed export writes file formats as compressed, size-rotated
+        chunks with an index of the message ids and dates in each chunk; the
+        returned path is that index.
+        """
+        try:
+            with self.console.status("[cyan]Fetching messages...[/cyan]") as status:
+                result = await self._export(chat_id, format_type, limit, incremental, compress,
+                                            on_start=self._print_start,
+                                            on_message=lambda count: self._show_count(status, count))
         except Exception as e:
             self.console.print(f"[bold red]Error exporting chat: {e}[/bold red]")
             return None
+        self.console.print(f"[bold green]Export completed! {result['messages']} messages saved to "
+                           f"{result['path']}[/bold green]")
+        return result['path']
+
+    async def export_chats(self, chat_ids: List[int], format_type: str = 'json', incremental: bool = False,
+                           compress: bool = False, concurrency: int = EXPORT_CONCURRENCY):
+        """Exports several chats at once, at most ``concurrency`` at a time.
+
+        All exports share the client's rate limiter, so a flood wait on one
+        chat slows down the others instead of each one running into its own.
+        A single progress bar counts finished chats and exported messages, and a
+        manifest listing every chat's result is written next to the exports.
+
+        Args:
+            chat_ids: Chats to export
+            format_type: Export format, as for ``export_chat``
+            incremental: Only export messages newer than the previous export of each chat
+            compress: Write compressed, size-rotated chunks
+            concurrency: Maximum number of chats exported at the same time
+
+        Returns:
+            Path of the manifest file
+        """
+        started = datetime.datetime.now()
+        # The rate limiter's counters are process-wide; the manifest reports this job's share
+        stats_before = self.rate_limiter.stats()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        results = []
+
+        with Progress(TextColumn("[progress.description]{task.description}"), BarColumn(), MofNCompleteColumn(),
+                      TextColumn("chats, {task.fields[messages]} messages"), TimeElapsedColumn(),
+                      console=self.console) as progress:
+            overall = progress.add_task(f"Exporting {len(chat_ids)} chats", total=len(chat_ids), messages=0)
+
+            exported = 0
+
+            def count_message(_):
+                nonlocal exported
+                exported += 1
+                progress.update(overall, messages=exported)
+
+            async def export_one(chat_id):
+                async with semaphore:
+                    chat_started = time.monotonic()
+                    try:
+                        result = await self._export(chat_id, format_type, None, incremental, compress,
+                                                    on_message=count_message)
+                        result["status"] = "ok"
+                        progress.console.print(f"[green]✓ {result['name']}: {result['messages']} messages[/green]")
+                    except Exception as e:
+                        result = {"chat_id": chat_id, "status": "failed", "error": str(e)}
+                        progress.console.print(f"[red]✗ {chat_id}: {e}[/red]")
+                    result["seconds"] = round(time.monotonic() - chat_started, 1)
+                    results.append(result)
+                    progress.advance(overall)
+
+            await asyncio.gather(*(export_one(chat_id) for chat_id in chat_ids))
+
+        order = {chat_id: index for index, chat_id in enumerate(chat_ids)}
+        results.sort(key=lambda result: order[result["chat_id"]])
+        stats = self.rate_limiter.stats()
+        manifest = {
+            "started": started.isoformat(timespec="seconds"),
+            "finished": datetime.datetime.now().isoformat(timespec="seconds"),
+            "format": format_type,
+            "incremental": incremental,
+            "compressed": compress and format_type != 'sqlite',
+            "concurrency": concurrency,
+            "chats": len(chat_ids),
+            "succeeded": sum(result["status"] == "ok" for result in results),
+            "failed": sum(result["status"] != "ok" for result in results),
+            "messages": sum(result.get("messages", 0) for result in results),
+            "flood_waits": stats["flood_waits"] - stats_before["flood_waits"],
+            "rate_limit_wait_seconds": round(stats["waited_seconds"] - stats_before["waited_seconds"], 1),
+            "results": results
+        }
+        os.makedirs(EXPORT_FOLDER_PATH, exist_ok=True)
+        manifest_path = f"{EXPORT_FOLDER_PATH}/manifest_{started.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+
+        self.console.print(f"[bold green]Exported {manifest['succeeded']}/{len(chat_ids)} chats, "
+                           f"{manifest['messages']} messages. Manifest saved to {manifest_path}[/bold green]")
+        return manifest_path
+
+    async def _export(self, chat_id: int, format_type: str, limit: Optional[int], incremental: bool, compress: bool,
+                      on_start: Optional[Callable[[str, int], None]] = None,
+                      on_message: Optional[Callable[[int], None]] = None) -> dict:
+        """Export one chat; raises on failure, after saving what was exported so far.
+
+        Args:
+            chat_id: Chat to export
+            format_type: Export format
+            limit: Maximum number of messages, or None for all
+            incremental: Only export messages newer than the previous export
+            compress: Write compressed chunks (ignored for the SQLite database)
+            on_start: Called with the chat name and the id exported messages follow (0 for all)
+            on_message: Called with the running message count after each message
+
+        Returns:
+            Dict with the chat id and name, output path, message count and highest exported id
+        """
+        chat = await self.rate_limiter.call("resolve", self.client.get_entity, chat_id)
+        chat_name = getattr(chat, 'title', getattr(chat, 'username', str(chat_id))) or str(chat_id)
+        
+        # Sanitize filename
+        safe_name = "".join([c for c in chat_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_')]).strip()
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(EXPORT_FOLDER_PATH, exist_ok=True)
+        
+        # Chunked archives are tracked separately from plain files of the same format
+        compress = compress and format_type != 'sqlite'
+        archive_type = f"{format_type}.chunked" if compress else format_type
+        last_id, filename = self.export_state.get(chat_id, archive_type) if incremental else (0, None)
+        if filename is None or not os.path.exists(filename):
+            last_id = 0
+            # The chat id keeps chats with equal or unprintable titles apart in concurrent bulk exports
+            base = f"{EXPORT_FOLDER_PATH}/{safe_name}_{chat_id}"
+            if not incremental:
+                base = f"{base}_{timestamp}"
+            if format_type == 'sqlite':
+                filename = EXPORT_DATABASE_FILE_PATH
+            elif compress:
+                filename = f"{base}{INDEX_SUFFIX}"
+            else:
+                filename = f"{base}.{format_type}"
+        writer = create_writer(format_type, filename, chat.id, chat_name, append=incremental and last_id > 0,
+                               compress=compress)
+        # A reopened archive knows its own last message, which wins over the recorded progress:
+        # messages written after the last record (e.g. before a crash) are kept, lost ones fetched again
+        if writer.resumed_id:
+            last_id = writer.resumed_id
+        if on_start:
+            on_start(chat_name, last_id)
+        
+        # Messages go to the file as they arrive; the writer is closed however the export ends,
+        # including cancellation, so whatever was fetched until then stays usable. Incremental
+        # exports only record messages the writer has flushed to disk as done
+        if incremental:
+            messages = self.rate_limiter.iter_messages(self.client, chat, limit=limit, min_id=last_id, reverse=True)
+        else:
+            messages = self.rate_limiter.iter_messages(self.client, chat, limit=limit)
+        completed = False
+        try:
+            async for message in messages:
+                writer.write(self._message_record(message))
+                if incremental and writer.count % writer.flush_interval == 0:
+                    self.export_state.update(chat_id, archive_type, max(last_id, writer.flushed_id), filename)
+                if on_message:
+                    on_message(writer.count)
+            completed = True
+        finally:
+            try:
+                writer.close()
+            finally:
+                if incremental:
+                    self.export_state.update(chat_id, archive_type, max(last_id, writer.flushed_id), filename)
+                if not completed:
+                    self.console.print(f"[yellow]Export of {chat_name} interrupted after {writer.count} messages; "
+                                       f"partial export saved to {filename}[/yellow]")
+        return {"chat_id": chat_id, "name": chat_name, "path": filename, "messages": writer.count,
+                "last_id": max(last_id, writer.flushed_id)}
+
+    def _print_start(self, chat_name: str, last_id: int) -> None:
+        if last_id:
+            self.console.print(f"[cyan]Exporting {chat_name} messages after #{last_id}...[/cyan]")
+        else:
+            self.console.print(f"[cyan]Starting export for {chat_name}...[/cyan]")
+
+    @staticmethod
+    def _show_count(status, count: int) -> None:
+        if count % 100 == 0:
+            status.update(f"[cyan]Fetched {count} messages...[/cyan]")
+
+    @staticmethod
+    def _message_record(message) -> dict:
+        return {
+            "id": message.id,
+            "date": message.date.isoformat(),
+            "sender_id": message.sender_id,
+            "text": message.text,
+            "reply_to_msg_id": message.reply_to_msg_id,
+            "media": bool(message.media)
+        }
 
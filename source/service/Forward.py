@@ -1,10 +1,20 @@
-from typing import Optional, List
+import asyncio
+from functools import partial
+from typing import Optional, List, Dict, Iterable, Set
 
-from telethon import events, TelegramClient
+from telethon import events, utils, TelegramClient
+from telethon.errors import ChatForwardsRestrictedError
 from telethon.tl.custom import Message
+from telethon.tl.types import PeerChannel
 
+from source.model.Checkpoint import Checkpoint
+from source.model.ForwardConfig import ForwardConfig
+from source.model.RoutingTable import RoutingTable
+from source.service.DeleteBatcher import DeleteBatcher
+from source.service.ForwardQueue import ForwardQueue
 from source.service.HistoryService import HistoryService
 from source.service.MessageForwardService import MessageForwardService
+from source.utils.Constants import HISTORY_PREFETCH_SIZE, HISTORY_CONCURRENCY, COPY_BATCH_SIZE
 
 
 class Forward:
@@ -15,26 +25,40 @@ class Forward:
     
     Attributes:
         client (TelegramClient): The Telegram client instance
-        forward_config_map (dict): Mapping of source chat IDs to forward configurations
+        routes (RoutingTable): Compiled routes from source chats to their destination chats
         history (HistoryService): Service for tracking message forwarding history
         message_forward (MessageForwardService): Service for handling message forwarding operations
+        delete_batcher (DeleteBatcher): Coalesces propagated deletions per destination
+        checkpoint (Checkpoint): Last forwarded history message per source/destination pair
+        live_queue (ForwardQueue): Bounded queues and workers doing the live forwarding work
+        live_since (dict): Source chat ID -> ID of its first live message; history
+            forwarding stops there, so a catch-up next to live forwarding sends nothing twice
     """
 
-    def __init__(self, client: TelegramClient, forward_config_map: dict):
+    def __init__(self, client: TelegramClient, forward_configs: Iterable[ForwardConfig]):
         """Initialize Forward service.
         
         Args:
             client: Telegram client instance
-            forward_config_map: Mapping of source chat IDs to forward configurations
+            forward_configs: Forward configurations; a source may appear with several destinations
         """
         self.client = client
-        self.forward_config_map = forward_config_map
+        self.routes = RoutingTable(forward_configs)
         self.history = HistoryService()
         self.message_forward = MessageForwardService(client)
+        self.delete_batcher = DeleteBatcher(client, on_deleted=self._forget_copies)
+        self.checkpoint = Checkpoint()
+        self.live_queue = ForwardQueue(self.routes, scheduler=self.message_forward.rate_limiter.scheduler)
+        self.live_since: Dict[int, int] = {}
 
     def add_events(self) -> None:
-        """Register message and album event handlers."""
-        source_chats = list(self.forward_config_map.keys())
+        """Start the live forward workers and register message, album, edit and deletion event handlers.
+
+        Handlers only queue work for the workers, so a slow transfer never stalls
+        the processing of updates from unrelated chats.
+        """
+        self.live_queue.start()
+        source_chats = list(self.routes.sources)
         self.client.add_event_handler(
             self.message_handler,
             events.NewMessage(chats=source_chats)
@@ -43,6 +67,16 @@ class Forward:
             self.album_handler,
             events.Album(chats=source_chats)
         )
+        self.client.add_event_handler(
+            self.edit_handler,
+            events.MessageEdited(chats=source_chats)
+        )
+        # Deletions outside channels arrive without a chat id and would be dropped
+        # by a chats filter, so the handler matches them itself.
+        self.client.add_event_handler(
+            self.delete_handler,
+            events.MessageDeleted()
+        )
 
     async def message_handler(self, event: events.NewMessage.Event) -> None:
         """Handle single message events.
@@ -54,12 +88,13 @@ class Forward:
             if event.grouped_id:
                 return
 
-            destination_id = self._get_destination_id(event.chat_id)
-            if not destination_id:
+            destinations = self.routes.destinations(event.chat_id)
+            if not destinations:
                 return
 
-            reply_message = await self._handle_reply(event.message, destination_id)
-            await self._forward_message(destination_id, event.message, reply_message)
+            self.live_since.setdefault(event.chat_id, event.message.id)
+            await self.live_queue.submit(
+                event.chat_id, partial(self._forward_to_destinations, destinations, event.message))
 
         except Exception as e:
             print(f"Error handling message: {e}")
@@ -71,51 +106,446 @@ class Forward:
             event: Album event
         """
         try:
-            destination_id = self._get_destination_id(event.chat_id)
-            if not destination_id:
+            destinations = self.routes.destinations(event.chat_id)
+            if not destinations:
                 return
 
-            reply_message = await self._get_album_reply(event.messages, destination_id)
-            await self._forward_album(destination_id, event, reply_message)
+            self.live_since.setdefault(event.chat_id, min(message.id for message in event.messages))
+            await self.live_queue.submit(
+                event.chat_id, partial(self._forward_album_to_destinations, destinations, event.messages, event.text))
 
         except Exception as e:
             print(f"Error handling album: {e}")
 
-    async def history_handler(self) -> None:
-        """Forward all historical messages from source chats."""
-        last_message_id = 0
-        for source in self.forward_config_map:
-            await self._forward_chat_history(source, last_message_id)
+    async def edit_handler(self, event: events.MessageEdited.Event) -> None:
+        """Propagate an edited source message to its copies.
+
+        The edit is queued behind the message itself, so it finds the mapping of
+        a copy that was still being sent.
+
+        Args:
+            event: Message edited event
+        """
+        try:
+            await self.live_queue.submit(event.chat_id, partial(self._propagate_edit, event.message))
+
+        except Exception as e:
+            print(f"Error handling edit: {e}")
+
+    async def _propagate_edit(self, message: Message) -> None:
+        """Apply an edited source message to all of its copies.
+
+        Args:
+            message: Edited source message
+        """
+        for destination_id in self.routes.destinations(message.chat_id):
+            dest_msg_id = self.history.get_mapping(message.chat_id, message.id, destination_id)
+            if dest_msg_id is None:
+                continue
+
+            await self.message_forward.edit_message(destination_id, dest_msg_id, message)
+
+    async def delete_handler(self, event: events.MessageDeleted.Event) -> None:
+        """Propagate deleted source messages and forget deleted copies.
+
+        Args:
+            event: Message deleted event
+        """
+        try:
+            if event.chat_id is None:
+                # Ids outside channels are unique per account, so every such source is a candidate
+                sources = [source for source in self.routes.sources
+                           if utils.resolve_id(source)[1] is not PeerChannel]
+                destinations = [destination for destination in self.routes.all_destinations
+                                if utils.resolve_id(destination)[1] is not PeerChannel]
+            else:
+                sources = [event.chat_id] if event.chat_id in self.routes else []
+                destinations = [event.chat_id] if event.chat_id in self.routes.all_destinations else []
+
+            for source in sources:
+                await self.live_queue.submit(source, partial(self._propagate_deletion, source, event.deleted_ids))
+
+            for destination_id in destinations:
+                self._forget_copies(destination_id, event.deleted_ids)
+
+        except Exception as e:
+            print(f"Error handling deletion: {e}")
+
+    async def _propagate_deletion(self, source: int, deleted_ids: List[int]) -> None:
+        """Queue the copies of deleted source messages for batched deletion.
+
+        Args:
+            source: Source chat ID
+            deleted_ids: IDs of the deleted source messages
+        """
+        for destination_id in self.routes.destinations(source):
+            dest_msg_ids = [
+                dest_msg_id for dest_msg_id in (
+                    self.history.get_mapping(source, msg_id, destination_id) for msg_id in deleted_ids
+                ) if dest_msg_id is not None
+            ]
+            if dest_msg_ids:
+                await self.delete_batcher.add(destination_id, dest_msg_ids)
+
+    async def history_handler(self, reset: bool = False, concurrency: int = HISTORY_CONCURRENCY,
+                              copy: bool = False, catch_up: bool = False) -> None:
+        """Forward all historical messages from source chats.
+
+        Sources that share a destination are grouped into one serial lane, so a
+        destination receives its sources one after another and each in message
+        order. Independent lanes run concurrently, at most ``concurrency`` at a time.
+        Each destination of a source resumes after its last checkpointed message;
+        messages that already have a copy in the destination are skipped.
+
+        Args:
+            reset: Discard saved checkpoints and start from the beginning
+            concurrency: Maximum number of lanes forwarded at the same time
+            copy: Copy messages server-side in batches instead of re-uploading them one by one
+            catch_up: Running next to live forwarding; destinations without a
+                checkpoint start at the newest message instead of the beginning
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        try:
+            await asyncio.gather(*(
+                self._forward_history_lane(sources, reset, copy, semaphore, catch_up)
+                for sources in self.routes.lanes()
+            ))
+        finally:
+            self.checkpoint.flush()
+
+        skipped = self.message_forward.skip_stats
+        skipped_messages = sum(stats["messages"] for stats in skipped.values())
+        if skipped_messages:
+            skipped_bytes = sum(stats["bytes"] for stats in skipped.values())
+            print(f"Skipped {skipped_messages} filtered or duplicate messages; "
+                  f"{skipped_bytes / (1024 * 1024):.1f} MB of media were not transferred")
+
+    async def _forward_history_lane(self, sources: List[int], reset: bool, copy: bool,
+                                    semaphore: asyncio.Semaphore, catch_up: bool = False) -> None:
+        """Forward the history of all sources of one lane, one source at a time.
+
+        Args:
+            sources: Source chat IDs of the lane, in configuration order
+            reset: Discard saved checkpoints and start from the beginning
+            copy: Copy messages server-side in batches instead of re-uploading them one by one
+            semaphore: Limits the number of lanes running at once
+            catch_up: Start destinations without a checkpoint at the newest message
+        """
+        forward_history = self._copy_chat_history if copy else self._forward_chat_history
+        async with semaphore:
+            for source in sources:
+                try:
+                    if reset:
+                        for destination_id in self.routes.destinations(source):
+                            self.checkpoint.reset(source, destination_id)
+                    if catch_up:
+                        await self._start_checkpoints_now(source)
+                    last_message_id = min(self.checkpoint.get(source, destination_id)
+                                          for destination_id in self.routes.destinations(source))
+                    await forward_history(source, last_message_id)
+                except Exception as e:
+                    print(f"Error forwarding history of {source}: {e}")
+
+    async def _start_checkpoints_now(self, source: int) -> None:
+        """Set the checkpoints of destinations that never received history to the newest message.
+
+        Args:
+            source: Source chat ID
+        """
+        new_destinations = [destination_id for destination_id in self.routes.destinations(source)
+                            if not self.checkpoint.get(source, destination_id)]
+        if not new_destinations:
+            return
+        latest = await self.message_forward.rate_limiter.call(
+            "history", self.client.get_messages, source, limit=1, peer=source)
+        if latest:
+            for destination_id in new_destinations:
+                self.checkpoint.update(source, destination_id, latest[0].id)
+
+    async def _forward_chat_history(self, source: int, last_message_id: int) -> int:
+        """Forward history from a specific chat, oldest message first.
+
+        Messages are streamed through a bounded prefetch queue: the next page is
+        fetched while the current one is being sent, and memory use does not
+        depend on the size of the chat. Every message is fetched once and sent to
+        all destinations that have not received it yet. A destination's checkpoint
+        only advances while every message so far reached it (or was skipped by its
+        rule), so a failed message is retried on resume. Consecutive messages
+        sharing a ``grouped_id`` are buffered and sent as one album.
 
-    async def _forward_chat_history(self, source: int, last_message_id: int) -> None:
-        """Forward history from a specific chat.
-        
         Args:
             source: Source chat ID
             last_message_id: ID of last processed message
+
+        Returns:
+            ID of the last processed message
         """
-        messages = await self.client.get_messages(source, min_id=last_message_id, limit=None)
-        destination_id = self._get_destination_id(source)
+        destinations = self.routes.destinations(source)
+        queue = asyncio.Queue(maxsize=HISTORY_PREFETCH_SIZE)
+        producer = asyncio.create_task(self._prefetch_history(source, last_message_id, queue))
+        album = []
+        # Destinations that missed a message in this run; their checkpoints stay before it
+        stalled = set()
+
+        try:
+            while True:
+                message = await queue.get()
+                # Album items arrive consecutively; the album is complete once another message or the end arrives
+                if album and (message is None or message.grouped_id != album[0].grouped_id):
+                    try:
+                        album_id = await self._forward_history_album(source, destinations, album, stalled)
+                        last_message_id = max(last_message_id, album_id)
+                    except Exception as e:
+                        stalled.update(destinations)
+                        print(f"Error forwarding album: {e}")
+                    album = []
+                if message is None:
+                    break
+                if message.grouped_id:
+                    album.append(message)
+                    continue
+                pending = []
+                try:
+                    pending = self._pending_destinations(source, destinations, message.id)
+                    admitted = self._admitted_destinations(pending, [message], message.text)
+                    sent_messages = await self._send_to_destinations(admitted, message)
+                    stalled.update(destination_id for destination_id in admitted if destination_id not in sent_messages)
+                    last_message_id = max(last_message_id, message.id)
+                except Exception as e:
+                    stalled.update(pending)
+                    print(f"Error forwarding message: {e}")
+                self._advance_checkpoints(source, destinations, message.id, stalled)
+        finally:
+            if not producer.done():
+                producer.cancel()
+        return last_message_id
+
+    async def _forward_history_album(self, source: int, destinations: List[int], album: List[Message],
+                                     stalled: Set[int]) -> int:
+        """Send a historical album as one album to every destination that has not received it yet.
 
-        for message in reversed(messages):
+        Destinations whose checkpoint lies inside the album (left by an earlier,
+        interrupted run) only get the items after it.
+
+        Args:
+            source: Source chat ID
+            destinations: Destination chat IDs of the source
+            album: Consecutive messages sharing one ``grouped_id``, oldest first
+            stalled: Destinations that missed a message in this run; extended by failed sends
+
+        Returns:
+            ID of the last message of the album
+        """
+        # Destinations are grouped by the first item they still need; messages are unhashable
+        remaining = {}
+        for destination_id in destinations:
+            checkpoint = self.checkpoint.get(source, destination_id)
+            items = [message for message in album if message.id > checkpoint
+                     and self.history.get_mapping(source, message.id, destination_id) is None]
+            if items:
+                remaining.setdefault(items[0].id, (items, []))[1].append(destination_id)
+        for items, pending in remaining.values():
             try:
-                reply_message = await self._handle_reply(message, destination_id)
-                await self._forward_message(destination_id, message, reply_message)
-                last_message_id = max(last_message_id, message.id)
+                caption = self._group_text(items)
+                admitted = self._admitted_destinations(pending, items, caption)
+                sent_albums = await self._send_album_to_destinations(admitted, items, caption)
+                stalled.update(destination_id for destination_id in admitted if destination_id not in sent_albums)
             except Exception as e:
-                print(f"Error forwarding message: {e}")
+                stalled.update(pending)
+                print(f"Error forwarding album: {e}")
+        self._advance_checkpoints(source, destinations, album[-1].id, stalled)
+        return album[-1].id
+
+    def _advance_checkpoints(self, source: int, destinations: Iterable[int], message_id: int,
+                             stalled: Set[int]) -> None:
+        """Move the checkpoints of all destinations that did not miss a message up to ``message_id``."""
+        for destination_id in destinations:
+            if destination_id not in stalled:
+                self.checkpoint.update(source, destination_id, message_id)
+
+    async def _copy_chat_history(self, source: int, last_message_id: int) -> int:
+        """Copy history from a specific chat server-side, oldest message first.
+
+        Messages are forwarded without the original sender in batches of up to
+        ``COPY_BATCH_SIZE`` ids per request, so no media is downloaded. Messages that
+        cannot be copied, e.g. because the source restricts forwarding, fall back to
+        the download/re-upload path. Albums are never split across batches. Each
+        batch is copied to every destination that has not received it yet.
 
-    def _get_destination_id(self, source_id: int) -> Optional[int]:
-        """Get destination chat ID for a source chat.
-        
         Args:
-            source_id: Source chat ID
-            
+            source: Source chat ID
+            last_message_id: ID of last processed message
+
+        Returns:
+            ID of the last processed message
+        """
+        destinations = self.routes.destinations(source)
+        queue = asyncio.Queue(maxsize=HISTORY_PREFETCH_SIZE)
+        producer = asyncio.create_task(self._prefetch_history(source, last_message_id, queue))
+        batch = []
+        use_copy = True
+        # Destinations that missed a message in this run; their checkpoints stay before it
+        stalled = set()
+
+        try:
+            while True:
+                message = await queue.get()
+                carry = []
+                if message is not None:
+                    # Service messages (joins, pins, ...) can be neither copied nor re-sent
+                    if message.action is None:
+                        batch.append(message)
+                    if len(batch) < COPY_BATCH_SIZE:
+                        continue
+                    batch, carry = self._split_open_album(batch)
+                if batch:
+                    for destination_id in destinations:
+                        checkpoint = self.checkpoint.get(source, destination_id)
+                        # Messages past the checkpoint may already have been delivered after a failed one
+                        pending = [pending_message for pending_message in batch if pending_message.id > checkpoint
+                                   and self.history.get_mapping(source, pending_message.id, destination_id) is None]
+                        groups = self._admitted_batch(destination_id, pending)
+                        if groups:
+                            use_copy = await self._copy_batch(
+                                source, destination_id, [message for group in groups for message in group], use_copy,
+                                stalled)
+                        # Messages the rule skipped after the last copied one are passed as well
+                        self._advance_checkpoints(source, [destination_id], batch[-1].id, stalled)
+                    last_message_id = max(last_message_id, batch[-1].id)
+                batch = carry
+                if message is None:
+                    break
+        finally:
+            if not producer.done():
+                producer.cancel()
+        return last_message_id
+
+    @staticmethod
+    def _split_open_album(batch: List[Message]):
+        """Split off a trailing album that may continue in the next batch.
+
+        Args:
+            batch: Messages collected for one copy request
+
+        Returns:
+            Tuple of (messages to send now, messages to carry over)
+        """
+        grouped_id = batch[-1].grouped_id
+        if not grouped_id:
+            return batch, []
+        start = len(batch)
+        while start > 0 and batch[start - 1].grouped_id == grouped_id:
+            start -= 1
+        if start == 0:
+            return batch, []
+        return batch[:start], batch[start:]
+
+    async def _copy_batch(self, source: int, destination_id: int, batch: List[Message], use_copy: bool,
+                          stalled: Set[int]) -> bool:
+        """Copy one batch server-side, re-uploading whatever could not be copied.
+
+        Args:
+            source: Source chat ID
+            destination_id: Destination chat ID
+            batch: Messages to copy, oldest first
+            use_copy: Whether server-side copying is still possible for this source
+            stalled: Destinations that missed a message in this run; extended if this batch misses one
+
+        Returns:
+            Whether server-side copying should be used for the next batch
+        """
+        sent_messages = [None] * len(batch)
+        if use_copy:
+            try:
+                sent_messages = await self.message_forward.copy_messages(destination_id, source, batch)
+            except ChatForwardsRestrictedError:
+                print("Source chat restricts forwarding; falling back to download and re-upload")
+                use_copy = False
+            except Exception as e:
+                print(f"Error copying messages: {e}")
+
+        # Failed messages are re-uploaded where they occur, albums as one album. The
+        # checkpoint only covers the run of delivered groups from the batch start,
+        # and does not move at all once an earlier batch missed a message.
+        confirmed_id = None
+        delivered = destination_id not in stalled
+        mappings = []
+        position = 0
+        for group in self._group_albums(batch):
+            sent_group = sent_messages[position:position + len(group)]
+            position += len(group)
+            mappings.extend((message.chat_id, message.id, destination_id, sent_message.id)
+                            for message, sent_message in zip(group, sent_group) if sent_message)
+            failed = [message for message, sent_message in zip(group, sent_group) if sent_message is None]
+            sent = True
+            if failed:
+                # Replies of the re-upload may point at messages copied just before
+                self.history.add_mappings(mappings)
+                mappings = []
+                if len(failed) > 1:
+                    reply_message = await self._get_album_reply(failed, destination_id)
+                    sent = await self._forward_album(destination_id, failed, self._group_text(failed), reply_message)
+                else:
+                    reply_message = await self._handle_reply(failed[0], destination_id)
+                    sent = await self._forward_message(destination_id, failed[0], reply_message)
+            delivered = delivered and bool(sent)
+            if delivered:
+                confirmed_id = group[-1].id
+        self.history.add_mappings(mappings)
+        if confirmed_id is not None:
+            self.checkpoint.update(source, destination_id, confirmed_id)
+        if not delivered:
+            stalled.add(destination_id)
+        return use_copy
+
+    async def _prefetch_history(self, source: int, last_message_id: int, queue: asyncio.Queue) -> None:
+        """Feed history messages newer than ``last_message_id`` into ``queue``, oldest first.
+
+        A ``None`` sentinel is queued once the history is exhausted, fetching fails,
+        or the first message already handled by live forwarding is reached. On
+        cancellation nothing is queued, since nobody is consuming anymore.
+
+        Args:
+            source: Source chat ID
+            last_message_id: ID of last processed message
+            queue: Bounded queue consumed by ``_forward_chat_history``
+        """
+        try:
+            async for message in self.message_forward.rate_limiter.iter_messages(
+                    self.client, source, min_id=last_message_id, reverse=True):
+                if message.id >= self.live_since.get(source, message.id + 1):
+                    break
+                await queue.put(message)
+        except Exception as e:
+            print(f"Error fetching history: {e}")
+        await queue.put(None)
+
+    def _pending_destinations(self, source: int, destinations: Iterable[int], message_id: int) -> List[int]:
+        """Get the destinations whose checkpoint is still below a history message and that have no copy of it.
+
+        Args:
+            source: Source chat ID
+            destinations: Destination chat IDs of the source
+            message_id: ID of the history message
+
         Returns:
-            Destination chat ID if found, None otherwise
+            Destination chat IDs that have not received the message yet
         """
-        config = self.forward_config_map.get(source_id)
-        return config.destinationID if config else None
+        return [destination_id for destination_id in destinations
+                if message_id > self.checkpoint.get(source, destination_id)
+                and self.history.get_mapping(source, message_id, destination_id) is None]
+
+    def _forget_copies(self, destination_id: int, dest_msg_ids: List[int]) -> None:
+        """Drop history mappings of destination messages that no longer exist.
+
+        Args:
+            destination_id: Destination chat ID
+            dest_msg_ids: IDs of the deleted destination messages
+        """
+        for dest_msg_id in dest_msg_ids:
+            source = self.history.get_source_mapping(destination_id, dest_msg_id)
+            if source is not None:
+                self.history.remove_mapping(source[0], source[1], destination_id)
 
     async def _handle_reply(self, message: Message, destination_id: int) -> Optional[int]:
         """Handle reply-to messages.
@@ -151,41 +581,257 @@ class Forward:
                 return reply
         return None
 
-    async def _forward_message(self, destination_id: int, message: Message, reply_to: Optional[int] = None) -> None:
+    async def _forward_to_destinations(self, destinations: Iterable[int], message: Message) -> Dict[int, Message]:
+        """Send a message to several destinations, fetching its media at most once.
+
+        Destinations whose rule rejects the message (keyword filter, duplicate)
+        are dropped first, from message metadata alone. The first remaining
+        destination goes through the regular forward path. Every further
+        destination reuses the copy sent to the first one, so media is resent by
+        reference instead of being downloaded and uploaded again.
+
+        Args:
+            destinations: Destination chat IDs
+            message: Message to forward
+
+        Returns:
+            Mapping of destination chat ID to the message sent there
+        """
+        destinations = self._admitted_destinations(destinations, [message], message.text)
+        return await self._send_to_destinations(destinations, message)
+
+    async def _send_to_destinations(self, destinations: List[int], message: Message) -> Dict[int, Message]:
+        """Send a message to destinations already admitted by their rules, fetching its media at most once.
+
+        Args:
+            destinations: Admitted destination chat IDs
+            message: Message to forward
+
+        Returns:
+            Mapping of destination chat ID to the message sent there
+        """
+        sent_messages = {}
+        first_copy = None
+        for destination_id in destinations:
+            reply_message = await self._handle_reply(message, destination_id)
+            if first_copy is None:
+                # Further destinations download again if the first copy cannot be reused
+                sent_message = await self._forward_message(destination_id, message, reply_message,
+                                                           cache_media=len(destinations) > 1)
+                first_copy = sent_message
+            else:
+                sent_message = await self._forward_copy(destination_id, message, first_copy, reply_message)
+            if sent_message:
+                sent_messages[destination_id] = sent_message
+                self._remember_sent(destination_id, [message], message.text)
+        return sent_messages
+
+    async def _forward_album_to_destinations(self, destinations: Iterable[int], messages: List[Message],
+                                             caption: str) -> Dict[int, List[Message]]:
+        """Send an album to several destinations, fetching its media at most once.
+
+        Args:
+            destinations: Destination chat IDs
+            messages: Messages of the album
+            caption: Album caption
+
+        Returns:
+            Mapping of destination chat ID to the album messages sent there
+        """
+        destinations = self._admitted_destinations(destinations, messages, caption)
+        return await self._send_album_to_destinations(destinations, messages, caption)
+
+    async def _send_album_to_destinations(self, destinations: List[int], messages: List[Message],
+                                          caption: str) -> Dict[int, List[Message]]:
+        """Send an album to destinations already admitted by their rules, fetching its media at most once.
+
+        Args:
+            destinations: Admitted destination chat IDs
+            messages: Messages of the album
+            caption: Album caption
+
+        Returns:
+            Mapping of destination chat ID to the album messages sent there
+        """
+        sent_albums = {}
+        first_copy = None
+        for destination_id in destinations:
+            reply_message = await self._get_album_reply(messages, destination_id)
+            if first_copy is None:
+                sent_messages = await self._forward_album(destination_id, messages, caption, reply_message,
+                                                          cache_media=len(destinations) > 1)
+                first_copy = sent_messages
+            else:
+                sent_messages = await self._forward_album_copy(destination_id, messages, first_copy,
+                                                               caption, reply_message)
+            if sent_messages:
+                sent_albums[destination_id] = sent_messages
+                self._remember_sent(destination_id, messages, caption)
+        return sent_albums
+
+    def _admitted_destinations(self, destinations: Iterable[int], messages: List[Message],
+                               text: Optional[str]) -> List[int]:
+        """Keep the destinations whose rule accepts a message or album.
+
+        This is the first step of every forward path: keyword filters and
+        duplicate checks only look at message metadata, so nothing is downloaded
+        for messages that would be dropped anyway.
+
+        Args:
+            destinations: Destination chat IDs
+            messages: The message, or all messages of an album
+            text: Message text or album caption
+
+        Returns:
+            Destination chat IDs the messages should be sent to
+        """
+        source = messages[0].chat_id
+        admitted = []
+        for destination_id in destinations:
+            config = self.routes.config(source, destination_id)
+            if config is None or self.message_forward.admit(destination_id, messages, text or '', config):
+                admitted.append(destination_id)
+        return admitted
+
+    def _remember_sent(self, destination_id: int, messages: List[Message], text: Optional[str]) -> None:
+        """Record sent messages for duplicate detection of later ones."""
+        config = self.routes.config(messages[0].chat_id, destination_id)
+        if config is not None:
+            self.message_forward.remember(destination_id, messages, text or '', config)
+
+    def _admitted_batch(self, destination_id: int, batch: List[Message]) -> List[List[Message]]:
+        """Split a copy batch into albums and single messages and keep those the rule accepts.
+
+        An album is judged as a whole by its caption, so it is never torn apart.
+        Each accepted group is recorded for duplicate detection right away, so a
+        duplicate later in the same batch is rejected too.
+
+        Args:
+            destination_id: Destination chat ID
+            batch: Messages of one source, oldest first
+
+        Returns:
+            Accepted groups of messages (one message, or all items of an album)
+        """
+        admitted = []
+        for group in self._group_albums(batch):
+            text = self._group_text(group)
+            if self._admitted_destinations([destination_id], group, text):
+                self._remember_sent(destination_id, group, text)
+                admitted.append(group)
+        return admitted
+
+    @staticmethod
+    def _group_albums(messages: List[Message]) -> List[List[Message]]:
+        """Split messages into albums (consecutive items sharing a ``grouped_id``) and single messages."""
+        groups = []
+        for message in messages:
+            if groups and message.grouped_id and groups[-1][0].grouped_id == message.grouped_id:
+                groups[-1].append(message)
+            else:
+                groups.append([message])
+        return groups
+
+    @staticmethod
+    def _group_text(group: List[Message]) -> str:
+        return next((message.text for message in group if message.text), '')
+
+    async def _forward_copy(self, destination_id: int, message: Message, first_copy: Message,
+                            reply_to: Optional[int] = None) -> Optional[Message]:
+        """Forward a message to a further destination by reusing its first copy.
+
+        Args:
+            destination_id: Destination chat ID
+            message: Original message
+            first_copy: Copy already sent to another destination
+            reply_to: Optional ID of message to reply to
+
+        Returns:
+            The sent message, or None if forwarding failed
+        """
+        try:
+            sent_message = await self.message_forward.resend_copy(destination_id, message, first_copy, reply_to)
+            if sent_message:
+                self._update_history(message, sent_message)
+            return sent_message
+        except Exception as e:
+            print(f"Error forwarding message: {e}")
+            return None
+
+    async def _forward_album_copy(self, destination_id: int, messages: List[Message], first_copy: List[Message],
+                                  caption: str, reply_to: Optional[int] = None) -> Optional[List[Message]]:
+        """Forward an album to a further destination by reusing its first copy.
+
+        Args:
+            destination_id: Destination chat ID
+            messages: Original album messages
+            first_copy: Album messages already sent to another destination
+            caption: Album caption
+            reply_to: Optional ID of message to reply to
+
+        Returns:
+            The sent messages, or None if forwarding failed
+        """
+        try:
+            sent_messages = await self.message_forward.resend_album_copy(
+                destination_id, messages, first_copy, caption, reply_to)
+            if sent_messages:
+                self._update_album_history(messages, sent_messages, destination_id)
+            return sent_messages
+        except Exception as e:
+            print(f"Error forwarding album: {e}")
+            return None
+
+    async def _forward_message(self, destination_id: int, message: Message,
+                               reply_to: Optional[int] = None, cache_media: bool = False) -> Optional[Message]:
         """Forward a single message.
         
         Args:
             destination_id: Destination chat ID
             message: Message to forward
             reply_to: Optional ID of message to reply to
+            cache_media: Keep downloaded media in the media cache, as it will be sent again
+
+        Returns:
+            The sent message, or None if forwarding failed
         """
         try:
-            sent_message = await self.message_forward.forward_message(destination_id, message, reply_to)
+            sent_message = await self.message_forward.forward_message(destination_id, message, reply_to, cache_media)
             if sent_message:
                 self._update_history(message, sent_message)
+            return sent_message
         except Exception as e:
             print(f"Error forwarding message: {e}")
+            return None
 
-    async def _forward_album(self, destination_id: int, event: events.Album.Event,
-                             reply_to: Optional[int] = None) -> None:
+    async def _forward_album(self, destination_id: int, messages: List[Message], caption: str,
+                             reply_to: Optional[int] = None, cache_media: bool = False) -> Optional[List[Message]]:
         """Forward an album/media group.
         
         Args:
             destination_id: Destination chat ID
-            event: Album event
+            messages: Messages of the album
+            caption: Album caption
             reply_to: Optional ID of message to reply to
+            cache_media: Keep downloaded media in the media cache, as it will be sent again
+
+        Returns:
+            The sent messages, or None if forwarding failed
         """
         try:
             sent_messages = await self.message_forward.forward_album(
                 destination_id,
-                event.messages,
-                event.text,
-                reply_to
+                messages,
+                caption,
+                reply_to,
+                cache_media
             )
             if sent_messages:
-                self._update_album_history(event, sent_messages, destination_id)
+                self._update_album_history(messages, sent_messages, destination_id)
+            return sent_messages
         except Exception as e:
             print(f"Error forwarding album: {e}")
+            return None
 
     def _update_history(self, source_message: Message, sent_message: Message) -> None:
         """Update message history mapping.
@@ -201,19 +847,16 @@ class Forward:
             sent_message.id
         )
 
-    def _update_album_history(self, event: events.Album.Event, sent_messages: List[Message],
+    def _update_album_history(self, messages: List[Message], sent_messages: List[Message],
                               destination_id: int) -> None:
         """Update history mapping for album messages.
         
         Args:
-            event: Album event
+            messages: Original album messages
             sent_messages: List of sent messages
             destination_id: Destination chat ID
         """
-        for i, message in enumerate(event.messages):
-            self.history.add_mapping(
-                event.chat_id,
-                message.id,
-                destination_id,
-                sent_messages[i].id
-            )
+        self.history.add_mappings(
+            (message.chat_id, message.id, destination_id, sent_message.id)
+            for message, sent_message in zip(messages, sent_messages)
+        )
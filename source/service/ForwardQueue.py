@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from source.model.RoutingTable import RoutingTable
+from source.service.RequestScheduler import RequestScheduler
+from source.utils.Constants import LIVE_QUEUE_SIZE, LIVE_WORKER_COUNT, LIVE_QUEUE_REPORT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class ForwardQueue:
+    """Bounded job queues for live forwarding, drained by a shared worker pool.
+
+    Event handlers only enqueue work; downloads, uploads and history writes run
+    in the workers. There is one queue per routing lane (sources that share a
+    destination, which for plain one-to-one rules is a single destination) and
+    each queue is drained in order, so every destination sees its messages in
+    source order. At most ``workers`` jobs run at a time across all lanes, and a
+    full queue blocks the submitting handler until there is room again. Queued
+    and running jobs are held as live work in the scheduler, so bulk requests
+    of the same client wait for them.
+
+    Attributes:
+        queue_size (int): Maximum number of pending jobs per lane
+        workers (int): Maximum number of jobs running at the same time
+        scheduler (RequestScheduler): Scheduler of the client the jobs use, if any
+    """
+
+    def __init__(self, routes: RoutingTable, queue_size: int = LIVE_QUEUE_SIZE, workers: int = LIVE_WORKER_COUNT,
+                 scheduler: Optional[RequestScheduler] = None):
+        self.queue_size = queue_size
+        self.workers = workers
+        self.scheduler = scheduler
+        self._lanes: List[List[int]] = routes.lanes()
+        self._lane_of_source: Dict[int, int] = {
+            source: lane for lane, sources in enumerate(self._lanes) for source in sources
+        }
+        self._queues: List[asyncio.Queue] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start one drain task per lane plus the periodic queue depth report."""
+        if self._tasks:
+            return
+        self._semaphore = asyncio.Semaphore(max(1, self.workers))
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self._lanes]
+        self._tasks = [asyncio.create_task(self._drain(queue)) for queue in self._queues]
+        self._tasks.append(asyncio.create_task(self._report()))
+
+    async def stop(self) -> None:
+        """Cancel the workers; pending jobs are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.scheduler:
+            for queue in self._queues:
+                for _ in range(queue.qsize()):
+                    self.scheduler.release_live()
+
+    async def submit(self, source_id: int, job: Job) -> None:
+        """Queue a job for the lane of a source, waiting while that lane is full.
+
+        Args:
+            source_id: Source chat ID the job belongs to
+            job: Coroutine function doing the actual work
+        """
+        lane = self._lane_of_source.get(source_id)
+        if lane is None:
+            return
+        queue = self._queues[lane]
+        if queue.full():
+            logger.warning(f"Live forward queue for lane {self._describe(lane)} is full; waiting for workers")
+        await queue.put(job)
+        if self.scheduler:
+            self.scheduler.hold_live()
+
+    def depths(self) -> Dict[str, int]:
+        """Number of pending jobs per lane, keyed by the lane's source chat IDs."""
+        return {self._describe(lane): queue.qsize() for lane, queue in enumerate(self._queues)}
+
+    def _describe(self, lane: int) -> str:
+        return ",".join(str(source) for source in self._lanes[lane])
+
+    async def _drain(self, queue: asyncio.Queue) -> None:
+        while True:
+            job = await queue.get()
+            try:
+                async with self._semaphore:
+                    await job()
+            except Exception as e:
+                print(f"Error in live forward worker: {e}")
+            finally:
+                queue.task_done()
+                if self.scheduler:
+                    self.scheduler.release_live()
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(LIVE_QUEUE_REPORT_INTERVAL)
+            depths = self.depths()
+            if any(depths.values()):
+                logger.info(f"Live forward queue depths: {depths}")
@@ -1,20 +1,49 @@
 import logging
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Iterable, Tuple
 
 from source.model.History import History
+from source.model.DedupStore import DedupStore
+from source.utils.Constants import DEDUP_STORE_FILE_PATH, DEDUP_PERSIST
 
 logger = logging.getLogger(__name__)
 
 class HistoryService:
-    """Service for managing message history and mappings between source and destination messages."""
-    
-    def __init__(self):
-        """Initialize the history service with the history model."""
-        self._history = History()
+    """Service for managing message history and mappings between source and destination messages.
+
+    All instances share one lazily opened ``History`` store, so the forwarding
+    components that each create a ``HistoryService`` do not load the data twice.
+    The fingerprints of recently forwarded messages, used for duplicate
+    detection, live in a shared ``DedupStore`` the same way.
+    """
+
+    _shared_history: Optional[History] = None
+    _shared_dedup: Optional[DedupStore] = None
+
+    def __init__(self, history: Optional[History] = None):
+        """Initialize the history service.
+
+        Args:
+            history: Optional explicit store; defaults to the shared one, opened on first use
+        """
+        self._own_history = history
+
+    @property
+    def _history(self) -> History:
+        if self._own_history is not None:
+            return self._own_history
+        if HistoryService._shared_history is None:
+            HistoryService._shared_history = History()
+        return HistoryService._shared_history
+
+    @property
+    def _dedup(self) -> DedupStore:
+        if HistoryService._shared_dedup is None:
+            HistoryService._shared_dedup = DedupStore(DEDUP_STORE_FILE_PATH if DEDUP_PERSIST else None)
+        return HistoryService._shared_dedup
 
     def add_mapping(self, source_chat_id: int, source_msg_id: int, dest_chat_id: int, dest_msg_id: int) -> None:
         """Add a mapping between source and destination messages.
-        
+
         Args:
             source_chat_id: ID of the source chat
             source_msg_id: ID of the source message
@@ -26,14 +55,25 @@ class HistoryService:
         except Exception as e:
             logger.error(f"Error adding message mapping: {e}", exc_info=True)
 
+    def add_mappings(self, mappings: Iterable[Tuple[int, int, int, int]]) -> None:
+        """Add several mappings at once, e.g. all items of an album, in a single history write.
+
+        Args:
+            mappings: (source chat ID, source message ID, destination chat ID, destination message ID) tuples
+        """
+        try:
+            self._history.add_mappings(mappings)
+        except Exception as e:
+            logger.error(f"Error adding message mappings: {e}", exc_info=True)
+
     def get_mapping(self, source_chat_id: int, source_msg_id: int, dest_chat_id: int) -> Optional[int]:
         """Get the destination message ID for a source message.
-        
+
         Args:
             source_chat_id: ID of the source chat
             source_msg_id: ID of the source message
             dest_chat_id: ID of the destination chat
-            
+
         Returns:
             Destination message ID if found, None otherwise
         """
@@ -43,10 +83,87 @@ class HistoryService:
             logger.error(f"Error getting message mapping: {e}", exc_info=True)
             return None
 
+    def remove_mapping(self, source_chat_id: int, source_msg_id: int, dest_chat_id: int) -> None:
+        """Forget the mapping of a source message, e.g. after its copy was deleted.
+
+        Args:
+            source_chat_id: ID of the source chat
+            source_msg_id: ID of the source message
+            dest_chat_id: ID of the destination chat
+        """
+        try:
+            self._history.remove_mapping(source_chat_id, source_msg_id, dest_chat_id)
+        except Exception as e:
+            logger.error(f"Error removing message mapping: {e}", exc_info=True)
+
+    def get_source_mapping(self, dest_chat_id: int, dest_msg_id: int) -> Optional[Tuple[int, int]]:
+        """Get the source message a destination message was copied from.
+
+        Args:
+            dest_chat_id: ID of the destination chat
+            dest_msg_id: ID of the destination message
+
+        Returns:
+            Tuple of (source chat ID, source message ID) if found, None otherwise
+        """
+        try:
+            return self._history.get_source_mapping(dest_chat_id, dest_msg_id)
+        except Exception as e:
+            logger.error(f"Error getting reverse message mapping: {e}", exc_info=True)
+            return None
+
+    def exists(self, fingerprint: int, at: Optional[float] = None) -> bool:
+        """Check whether a message fingerprint was forwarded recently.
+
+        Args:
+            fingerprint: Message fingerprint
+            at: Unix time to check at (the message date); defaults to now
+
+        Returns:
+            True if the fingerprint was recorded and has not expired yet
+        """
+        try:
+            return self._dedup.contains(fingerprint, at)
+        except Exception as e:
+            logger.error(f"Error checking message fingerprint: {e}", exc_info=True)
+            return False
+
+    def record(self, fingerprint: int, ttl: float, at: Optional[float] = None) -> None:
+        """Remember a forwarded message fingerprint.
+
+        Args:
+            fingerprint: Message fingerprint
+            ttl: Seconds during which the same fingerprint counts as a duplicate
+            at: Unix time the message was posted; defaults to now
+        """
+        try:
+            self._dedup.add(fingerprint, ttl, at)
+        except Exception as e:
+            logger.error(f"Error recording message fingerprint: {e}", exc_info=True)
+
+    def close(self) -> None:
+        """Compact pending journal entries into the snapshot and release the stores."""
+        if HistoryService._shared_dedup is not None:
+            try:
+                HistoryService._shared_dedup.close()
+            except Exception as e:
+                logger.error(f"Error saving message fingerprints: {e}", exc_info=True)
+            HistoryService._shared_dedup = None
+
+        history = self._own_history or HistoryService._shared_history
+        if history is None:
+            return
+        try:
+            history.close()
+        except Exception as e:
+            logger.error(f"Error closing message history: {e}", exc_info=True)
+        if history is HistoryService._shared_history:
+            HistoryService._shared_history = None
+
     def get_all_mappings(self) -> Dict[Tuple[int, int, int], int]:
         """Get all message mappings.
-        
+
         Returns:
             Dictionary of all message mappings
         """
-        return self._history.message_map 
\ No newline at end of file
+        return dict(self._history.items())
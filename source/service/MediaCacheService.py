@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from collections import OrderedDict
+from typing import Optional, BinaryIO
+
+from telethon import TelegramClient
+from telethon.tl.custom import Message
+
+from source.service.RateLimiter import RateLimiter
+from source.utils.Constants import (MEDIA_FOLDER_PATH, MEDIA_CACHE_INDEX_FILE_PATH, MEDIA_CACHE_QUOTA_BYTES,
+                                    MEDIA_CACHE_STORE_MAX_BYTES, MEDIA_CACHE_INDEX_SAVE_INTERVAL)
+
+logger = logging.getLogger(__name__)
+
+
+class MediaCacheService:
+    """Content-addressed media cache shared by every service that downloads media.
+
+    Files are keyed by their Telegram photo/document id, so a file seen in many
+    chats is downloaded once. The cache keeps at most ``quota_bytes`` on disk and
+    evicts the least recently used files first. Entries and hit/miss counters are
+    persisted in a small JSON index, so statistics survive restarts. The index is
+    rewritten at most every ``MEDIA_CACHE_INDEX_SAVE_INTERVAL`` seconds and on
+    ``flush()``; a crash in between only loses recent counters and entries.
+
+    Attributes:
+        directory (str): Folder holding the cached files
+        quota_bytes (int): Maximum total size of cached files
+        entries (OrderedDict): key -> {"path", "size"}, least recently used first
+    """
+
+    _shared: Optional["MediaCacheService"] = None
+
+    def __init__(self, directory: str = MEDIA_FOLDER_PATH, index_path: str = MEDIA_CACHE_INDEX_FILE_PATH,
+                 quota_bytes: int = MEDIA_CACHE_QUOTA_BYTES):
+        self.directory = directory
+        self.index_path = index_path
+        self.quota_bytes = quota_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        self.load_index()
+
+    @classmethod
+    def shared(cls) -> "MediaCacheService":
+        """The cache instance shared by all services of this process."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def media_key(message: Message) -> Optional[str]:
+        """Cache key of the message media, or None if it has no stable file id."""
+        photo = getattr(message, "photo", None)
+        if photo is not None:
+            return f"photo_{photo.id}"
+        document = getattr(message, "document", None)
+        if document is not None:
+            return f"document_{document.id}"
+        return None
+
+    def load_index(self) -> None:
+        try:
+            with open(self.index_path, 'r') as file:
+                data = json.load(file)
+        except Exception:
+            return
+        self.hits = data.get("hits", 0)
+        self.misses = data.get("misses", 0)
+        for key, path, size in data.get("entries", []):
+            if os.path.exists(path):
+                self.entries[key] = {"path": path, "size": size}
+                self.total_bytes += size
+
+    def save_index(self) -> None:
+        data = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": [[key, entry["path"], entry["size"]] for key, entry in self.entries.items()]
+        }
+        try:
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(data, file)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.error(f"Error saving media cache index: {e}")
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self) -> None:
+        """Write the index if it changed since the last save."""
+        if self._dirty:
+            self.save_index()
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= MEDIA_CACHE_INDEX_SAVE_INTERVAL:
+            self.save_index()
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of a cached file, counting a hit and marking it recently used, or None counting a miss."""
+        entry = self.entries.get(key)
+        if entry is not None and not os.path.exists(entry["path"]):
+            self._forget(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            self._changed()
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        self._changed()
+        return entry["path"]
+
+    async def download(self, client: TelegramClient, message: Message) -> Optional[str]:
+        """Return a local path for the message media, downloading it only on a cache miss.
+
+        Concurrent requests for the same file share one download.
+
+        Args:
+            client: Telegram client instance
+            message: Message containing media
+
+        Returns:
+            str: Path to the media file, or None if the message has nothing to download
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        rate_limiter = RateLimiter.for_client(client)
+        key = self.media_key(message)
+        if key is None:
+            return await rate_limiter.call("download", client.download_media, message, file=self.directory)
+
+        if key in self._inflight:
+            self.hits += 1
+            self._changed()
+            return await asyncio.shield(self._inflight[key])
+        path = self.get(key)
+        if path:
+            return path
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        path = None
+        try:
+            path = await rate_limiter.call("download", client.download_media, message, file=self._path_for(key, message))
+            if path:
+                self._add(key, path)
+            return path
+        finally:
+            future.set_result(path)
+            del self._inflight[key]
+
+    async def store(self, message: Message, media_file: BinaryIO, size: int) -> None:
+        """Copy an already downloaded buffer into the cache.
+
+        Buffers larger than ``MEDIA_CACHE_STORE_MAX_BYTES`` are not cached. The copy
+        runs in a worker thread, so the event loop keeps serving other transfers;
+        the caller must not use the buffer until it returns.
+        """
+        key = self.media_key(message)
+        if key is None or key in self.entries or size > MEDIA_CACHE_STORE_MAX_BYTES:
+            return
+        path = self._path_for(key, message)
+        try:
+            await asyncio.to_thread(self._copy_into, media_file, path)
+        except Exception as e:
+            logger.error(f"Error caching media {key}: {e}")
+            return
+        self._add(key, path)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "files": len(self.entries),
+            "bytes": self.total_bytes,
+            "quota_bytes": self.quota_bytes
+        }
+
+    def _copy_into(self, media_file: BinaryIO, path: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        position = media_file.tell()
+        media_file.seek(0)
+        try:
+            with open(path, 'wb') as file:
+                shutil.copyfileobj(media_file, file)
+        finally:
+            media_file.seek(position)
+
+    def _path_for(self, key: str, message: Message) -> str:
+        ext = getattr(message.file, "ext", None) or ""
+        return os.path.join(self.directory, f"{key}{ext}")
+
+    def _add(self, key: str, path: str) -> None:
+        if key in self.entries:
+            self._forget(key)
+        size = os.path.getsize(path)
+        self.entries[key] = {"path": path, "size": size}
+        self.total_bytes += size
+        self._evict(keep=key)
+        self._changed()
+
+    def _forget(self, key: str) -> None:
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry["size"]
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used files until the cache fits its quota."""
+        for key in list(self.entries):
+            if self.total_bytes <= self.quota_bytes:
+                break
+            if key == keep:
+                continue
+            path = self.entries[key]["path"]
+            self._forget(key)
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Error evicting cached media {path}: {e}")
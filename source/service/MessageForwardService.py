@@ -1,15 +1,21 @@
 import os
-import time
+import tempfile
 import asyncio
-import hashlib
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple, BinaryIO
 
 from telethon import TelegramClient
+from telethon.errors import (MessageNotModifiedError, FileReferenceExpiredError, ChatForwardsRestrictedError,
+                             MediaEmptyError, RPCError)
 from telethon.tl.custom import Message
+from telethon.tl.types import MessageMediaPhoto, MessageMediaDocument
 
-from source.utils.Constants import MEDIA_FOLDER_PATH
+from source.utils.Constants import MEDIA_SPOOL_THRESHOLD, ALBUM_TRANSFER_CONCURRENCY
 from source.model.ForwardConfig import ForwardConfig
+from source.model.DedupStore import DedupStore, fingerprint_hash
+from source.model.SimHashIndex import SimHashIndex, simhash
+from source.service.MediaCacheService import MediaCacheService
+from source.service.RateLimiter import RateLimiter
 
 # try HistoryService (if exists) for persistence; fallback to memory
 try:
@@ -29,97 +35,302 @@ class MessageForwardService:
         """
         self.client = client
 
-        self._dedup_cache = {}  # fingerprint -> timestamp
-
         self._history_service = HistoryService() if HistoryService else None
+        # bounded in-memory fingerprints, only used without a HistoryService
+        self._dedup_store = DedupStore() if self._history_service is None else None
+        # SimHash indexes for near-duplicate detection, per (destination_id, max distance)
+        self._near_duplicates = {}
+        # messages skipped by admit() before any media transfer, and the media bytes that were not fetched
+        self.skip_stats = {reason: {"messages": 0, "bytes": 0} for reason in ("filtered", "duplicate", "near_duplicate")}
+
+        # client-wide rate limiter shared with every other service
+        self.rate_limiter = RateLimiter.for_client(client)
 
-        # rate limiting: last send timestamp por destination_id
-        # key = destination_id (int) -> last_sent_timestamp (float)
-        self._last_sent = {}
+        # bytes and files that went through the media pipe, split by whether they stayed in memory
+        self.media_io_stats = {"in_memory_files": 0, "in_memory_bytes": 0, "spooled_files": 0, "spooled_bytes": 0}
+        self.media_cache = MediaCacheService.shared()
 
-    async def forward_message(self, destination_id: int, message: Message, reply_to: Optional[int] = None) -> Optional[Message]:
+    async def forward_message(self, destination_id: int, message: Message, reply_to: Optional[int] = None,
+                              cache_media: bool = False) -> Optional[Message]:
         try:
             if message.forward is not None:
-                return await self.client.forward_messages(destination_id, message)
+                return await self.rate_limiter.call(
+                    "send", self.client.forward_messages, destination_id, message, peer=destination_id)
+
+            if self._can_send_by_reference(message):
+                sent_message = await self._send_by_reference(
+                    destination_id, message.media, message.text or '', reply_to)
+                if sent_message:
+                    return sent_message
 
-            media_path = None
+            media_file = None
             try:
                 if message.media:
-                    media_path = await self._download_media(message)
+                    media_file = await self._download_media(message, cache_media)
                 
                 text = message.text or ''
                 
-                if media_path:
-                    return await self.client.send_file(
+                if media_file:
+                    return await self.rate_limiter.call(
+                        "send",
+                        self.client.send_file,
                         destination_id,
-                        media_path,
+                        await self._upload_media(message, media_file),
                         caption=text,
-                        reply_to=reply_to
+                        reply_to=reply_to,
+                        attributes=getattr(message.document, "attributes", None),
+                        peer=destination_id
                     )
                 else:
-                    return await self.client.send_message(
+                    return await self.rate_limiter.call(
+                        "send",
+                        self.client.send_message,
                         destination_id,
                         text,
-                        reply_to=reply_to
+                        reply_to=reply_to,
+                        peer=destination_id
                     )
             finally:
-                if media_path:
-                    self._delete_media(media_path)
+                if media_file:
+                    self._delete_media(media_file)
 
         except Exception as e:
             print(f"Error sending message: {e}")
             return None
 
+    async def resend_copy(self, destination_id: int, message: Message, first_copy: Message,
+                          reply_to: Optional[int] = None) -> Optional[Message]:
+        """Send a message to a further destination by reusing the copy sent to the first one.
+
+        The media of our own copy can always be sent again by reference, so nothing
+        is downloaded or uploaded a second time. Falls back to ``forward_message``.
+        """
+        if message.forward is None and self._can_send_by_reference(first_copy):
+            sent_message = await self._send_by_reference(
+                destination_id, first_copy.media, message.text or '', reply_to)
+            if sent_message:
+                return sent_message
+        return await self.forward_message(destination_id, message, reply_to)
+
+    async def resend_album_copy(self, destination_id: int, messages: List[Message], first_copy: List[Message],
+                                caption: str, reply_to: Optional[int] = None) -> Optional[List[Message]]:
+        """Send an album to a further destination by reusing the copy sent to the first one."""
+        if all(self._can_send_by_reference(sent_message) for sent_message in first_copy):
+            sent_messages = await self._send_by_reference(
+                destination_id, [sent_message.media for sent_message in first_copy], caption, reply_to)
+            if sent_messages:
+                return sent_messages
+        return await self.forward_album(destination_id, messages, caption, reply_to)
+
+    async def copy_messages(self, destination_id: int, source_id: int,
+                            messages: List[Message]) -> List[Optional[Message]]:
+        """Copy messages server-side without the original sender ("hide sender").
+
+        Nothing is downloaded. Errors such as ``ChatForwardsRestrictedError`` are
+        raised to the caller, which decides how to fall back.
+
+        Args:
+            destination_id: Destination chat ID
+            source_id: Source chat ID
+            messages: Up to 100 messages of the source chat
+
+        Returns:
+            Copied messages in input order, with None for messages that could not be copied
+        """
+        sent = await self.rate_limiter.call(
+            "send",
+            self.client.forward_messages,
+            destination_id,
+            [message.id for message in messages],
+            from_peer=source_id,
+            drop_author=True,
+            peer=destination_id
+        )
+        return list(sent)
+
+    async def edit_message(self, destination_id: int, dest_msg_id: int, message: Message) -> Optional[Message]:
+        """Replace the text of a forwarded copy with the text of the edited source message."""
+        try:
+            return await self.rate_limiter.call(
+                "edit", self.client.edit_message, destination_id, dest_msg_id, message.text or '', peer=destination_id)
+        except MessageNotModifiedError:
+            return None
+        except Exception as e:
+            print(f"Error editing message: {e}")
+            return None
+
     async def forward_album(
         self,
         destination_id: int,
         messages: List[Message],
         caption: str,
-        reply_to: Optional[int] = None
+        reply_to: Optional[int] = None,
+        cache_media: bool = False
     ) -> Optional[List[Message]]:
-        media_paths = []
+        media_files = []
         try:
-            media_paths = await self._download_album_media(messages)
-            return await self.client.send_file(
+            if all(self._can_send_by_reference(message) for message in messages):
+                sent_messages = await self._send_by_reference(
+                    destination_id, [message.media for message in messages], caption, reply_to)
+                if sent_messages:
+                    return sent_messages
+
+            media_files = await self._download_album_media(messages, cache_media)
+            if len(media_files) < len(messages):
+                # A partial album would map every item after the gap to the wrong copy
+                print(f"Error forwarding album: {len(messages) - len(media_files)} item(s) could not be downloaded")
+                return None
+            uploaded = await self._bounded_gather(
+                self._upload_media(message, media_file) for message, media_file in media_files)
+            return await self.rate_limiter.call(
+                "send",
+                self.client.send_file,
                 destination_id,
-                media_paths,
+                uploaded,
                 caption=caption,
-                reply_to=reply_to
+                reply_to=reply_to,
+                peer=destination_id
             )
         except Exception as e:
             print(f"Error forwarding album: {e}")
             return None
         finally:
-            self._cleanup_media(media_paths)
+            self._cleanup_media([media_file for _, media_file in media_files])
 
-    async def _download_media(self, message: Message) -> Optional[str]:
+    @staticmethod
+    def _can_send_by_reference(message: Message) -> bool:
+        """Whether the message media can be sent again as-is, without downloading it.
+
+        Only photos and documents (which include videos, stickers and voice notes)
+        are re-sendable. Self-destructing media and chats known to restrict
+        forwarding are skipped right away.
+        """
+        media = message.media
+        if not isinstance(media, (MessageMediaPhoto, MessageMediaDocument)):
+            return False
+        if getattr(media, "ttl_seconds", None):
+            return False
+        return not getattr(message.chat, "noforwards", False)
+
+    async def _send_by_reference(self, destination_id: int, media, caption: str, reply_to: Optional[int] = None):
+        """Send media objects by their file reference.
+
+        Returns:
+            The sent message(s), or None when the reference is expired or the
+            source forbids it, so the caller can fall back to downloading
+        """
+        try:
+            return await self.rate_limiter.call(
+                "send",
+                self.client.send_file,
+                destination_id,
+                media,
+                caption=caption,
+                reply_to=reply_to,
+                peer=destination_id
+            )
+        except (FileReferenceExpiredError, ChatForwardsRestrictedError, MediaEmptyError) as e:
+            logging.info(f"Cannot send media by reference ({e.__class__.__name__}); downloading instead")
+        except RPCError as e:
+            logging.warning(f"Sending media by reference failed: {e}; downloading instead")
+        return None
+
+    async def _download_media(self, message: Message, cache_media: bool = False) -> Optional[BinaryIO]:
+        """Download media into an in-memory buffer that spills to disk when large.
+
+        Files already in the shared media cache are opened from there instead.
+        Otherwise files up to ``MEDIA_SPOOL_THRESHOLD`` bytes stay in memory and
+        larger ones roll over to an anonymous temporary file, which the OS removes
+        even if the process crashes. With ``cache_media``, set when the caller
+        expects to need the file again, small results are added to the media cache.
+
+        Returns:
+            The buffer positioned at its start, or None if there was nothing to download
+        """
+        key = self.media_cache.media_key(message)
+        cached_path = self.media_cache.get(key) if key else None
+        if cached_path:
+            try:
+                return open(cached_path, 'rb')
+            except OSError as e:
+                logging.warning(f"Cannot open cached media {cached_path}: {e}")
+
+        media_file = tempfile.SpooledTemporaryFile(max_size=MEDIA_SPOOL_THRESHOLD)
         try:
-            os.makedirs(MEDIA_FOLDER_PATH, exist_ok=True)
-            return await self.client.download_media(message, file=MEDIA_FOLDER_PATH)
+            if await self.rate_limiter.call("download", self._download_into, message, media_file) is None:
+                media_file.close()
+                return None
+            size = media_file.tell()
+            media_file.seek(0)
         except Exception as e:
+            media_file.close()
             print(f"Error downloading media: {e}")
             return None
 
-    async def _download_album_media(self, messages: List[Message]) -> List[str]:
-        media_paths = []
-        for message in messages:
-            if message.media:
-                path = await self._download_media(message)
-                if path:
-                    media_paths.append(path)
-        return media_paths
+        kind = "spooled" if size > MEDIA_SPOOL_THRESHOLD else "in_memory"
+        self.media_io_stats[f"{kind}_files"] += 1
+        self.media_io_stats[f"{kind}_bytes"] += size
+        logging.info(f"Media pipe: {size} bytes {kind.replace('_', ' ')}; totals {self.media_io_stats}")
+        if cache_media:
+            await self.media_cache.store(message, media_file, size)
+        return media_file
+
+    async def _upload_media(self, message: Message, media_file: BinaryIO):
+        """Upload a downloaded buffer under the original file name, so its type is kept."""
+        media_file.seek(0, os.SEEK_END)
+        size = media_file.tell()
+        media_file.seek(0)
+        file_name = getattr(message.file, "name", None) or f"media{getattr(message.file, 'ext', '') or ''}"
+
+        async def upload():
+            media_file.seek(0)
+            return await self.client.upload_file(media_file, file_name=file_name, file_size=size)
+
+        return await self.rate_limiter.call("upload", upload)
+
+    async def _download_into(self, message: Message, media_file: BinaryIO):
+        """Download media into a buffer, dropping what an interrupted earlier attempt left in it."""
+        media_file.seek(0)
+        media_file.truncate()
+        return await self.client.download_media(message, file=media_file)
+
+    async def _download_album_media(self, messages: List[Message],
+                                    cache_media: bool = False) -> List[Tuple[Message, BinaryIO]]:
+        """Download all album items concurrently, keeping the album order."""
+        with_media = [message for message in messages if message.media]
+        downloaded = await self._bounded_gather(self._download_media(message, cache_media) for message in with_media)
+        return [(message, media_file) for message, media_file in zip(with_media, downloaded) if media_file]
 
     @staticmethod
-    def _delete_media(media_path: str) -> None:
+    async def _bounded_gather(coroutines, limit: int = ALBUM_TRANSFER_CONCURRENCY) -> list:
+        """Run coroutines with at most ``limit`` in flight; results keep the input order.
+
+        All coroutines finish before the first error is raised, so no transfer is
+        still using a buffer when the caller cleans up.
+        """
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        results = await asyncio.gather(*(run(coroutine) for coroutine in coroutines), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    @staticmethod
+    def _delete_media(media_file: BinaryIO) -> None:
         try:
-            os.remove(media_path)
+            media_file.close()
         except Exception as e:
-            print(f"Error deleting media file {media_path}: {e}")
+            print(f"Error releasing media buffer: {e}")
 
     @staticmethod
-    def _cleanup_media(media_paths: List[str]) -> None:
-        for path in media_paths:
-            MessageForwardService._delete_media(path)
+    def _cleanup_media(media_files: List[BinaryIO]) -> None:
+        for media_file in media_files:
+            MessageForwardService._delete_media(media_file)
 
     def filter_message(self, message_text: str, forward_config: ForwardConfig) -> bool:
         """
@@ -137,118 +348,140 @@ class MessageForwardService:
             return forward_config._matches_any(text, forward_config.include_keywords)
         return True
 
-    def _fingerprint(self, message) -> str:
+    def admit(self, destination_id: int, messages: List[Message], text: str,
+              forward_config: ForwardConfig) -> bool:
+        """Decide whether a message or album goes to a destination, before anything is fetched.
+
+        Runs the keyword filter, the exact and the near-duplicate checks using only
+        message metadata (text, photo/document ids, media size), so a rejected
+        video is never downloaded. Also applies the destination's rate limit
+        setting. Call ``remember`` once the messages were sent.
+
+        Args:
+            destination_id: Destination chat ID
+            messages: The message, or all messages of an album
+            text: Message text or album caption
+            forward_config: Rule routing the source to this destination
+
+        Returns:
+            True if the messages should be sent
+        """
+        at = self._posted_at(messages)
+        if not self.filter_message(text, forward_config):
+            reason = "filtered"
+        elif getattr(forward_config, "deduplicate", False) and \
+                self._is_duplicate(self._fingerprint(messages, destination_id), at):
+            reason = "duplicate"
+        elif getattr(forward_config, "near_duplicate", False) and \
+                self._is_near_duplicate(destination_id, text, forward_config, at):
+            reason = "near_duplicate"
+        else:
+            self._apply_rate_limit(destination_id, forward_config)
+            return True
+
+        stats = self.skip_stats[reason]
+        stats["messages"] += len(messages)
+        stats["bytes"] += sum(self._media_size(message) for message in messages)
+        logging.info(f"Skipped {len(messages)} message(s) for {destination_id} ({reason}); "
+                     f"media bytes not transferred so far: {sum(s['bytes'] for s in self.skip_stats.values())}")
+        return False
+
+    def remember(self, destination_id: int, messages: List[Message], text: str,
+                 forward_config: ForwardConfig) -> None:
+        """Record sent messages, so later duplicates of them are skipped by ``admit``."""
+        at = self._posted_at(messages)
+        ttl = getattr(forward_config, "dedup_ttl_seconds", 3600)
+        if getattr(forward_config, "deduplicate", False):
+            self._record_fingerprint(self._fingerprint(messages, destination_id), ttl, at)
+        if getattr(forward_config, "near_duplicate", False):
+            signature = simhash(text or "")
+            if signature is not None:
+                self._near_duplicate_index(destination_id, forward_config).add(signature, ttl, at)
+
+    @staticmethod
+    def _posted_at(messages: List[Message]) -> Optional[float]:
+        date = getattr(messages[0], "date", None)
+        return date.timestamp() if date else None
+
+    @staticmethod
+    def _media_size(message: Message) -> int:
+        """Size of the message media as announced by Telegram, without downloading it."""
+        if not getattr(message, "media", None):
+            return 0
+        return getattr(getattr(message, "file", None), "size", None) or 0
+
+    def _fingerprint(self, messages: List[Message], destination_id: int) -> int:
         """
-        Gera fingerprint simples baseada em texto, ids de mídia e remetente.
-        Ajuste conforme os atributos reais do objeto 'message' no projeto.
+        Fingerprint of a message (or album) from its text, media identity, sender and chat,
+        per destination. Media is identified by Telethon's photo.id / document.id, which
+        stay the same when the same file is posted again.
         """
         parts = []
-        text = getattr(message, "text", "") or ""
-        parts.append(text)
-        try:
-            if hasattr(message, "photo") and message.photo:
-                parts.append("photo:" + ",".join([getattr(p, "file_unique_id", str(getattr(p, "file_id", ""))) for p in message.photo]))
-            if hasattr(message, "document") and getattr(message, "document", None):
-                doc = message.document
-                parts.append("doc:" + getattr(doc, "file_unique_id", str(getattr(doc, "file_id", ""))))
-            if hasattr(message, "video") and getattr(message, "video", None):
-                vid = message.video
-                parts.append("video:" + getattr(vid, "file_unique_id", str(getattr(vid, "file_id", ""))))
-            # sender/chat ids (retratos seguros de possíveis atributos do telethon)
-            sender_id = getattr(message, "sender_id", None) \
-                        or getattr(getattr(message, "from_user", None), "id", None) \
-                        or getattr(getattr(message, "sender", None), "id", None) \
-                        or ""
-            chat_id = getattr(message, "chat_id", None) \
-                      or getattr(getattr(message, "chat", None), "id", None) \
-                      or ""
-            parts.append("from:" + str(sender_id))
-            parts.append("chat:" + str(chat_id))
-        except Exception:
-            parts.append(str(getattr(message, "message_id", "")))
-        raw = "|".join(parts)
-        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
-
-    def _is_duplicate(self, fingerprint: str, ttl: int) -> bool:
-        now = time.time()
+        for message in messages:
+            parts.append(getattr(message, "text", "") or "")
+            photo = getattr(message, "photo", None)
+            if photo is not None:
+                parts.append(f"photo:{photo.id}")
+            document = getattr(message, "document", None)
+            if document is not None:
+                parts.append(f"doc:{document.id}")
+        parts.append(f"from:{getattr(messages[0], 'sender_id', None) or ''}")
+        parts.append(f"chat:{getattr(messages[0], 'chat_id', None) or ''}")
+        parts.append(f"to:{destination_id}")
+        return fingerprint_hash("|".join(parts).encode("utf-8"))
+
+    def _is_duplicate(self, fingerprint: int, at: Optional[float] = None) -> bool:
         if self._history_service:
-            try:
-                if hasattr(self._history_service, "exists"):
-                    return self._history_service.exists(fingerprint, ttl)
-                if hasattr(self._history_service, "is_recent"):
-                    return self._history_service.is_recent(fingerprint, ttl)
-            except Exception:
-                logging.exception("HistoryService check failed; fallback to memory dedup.")
+            return self._history_service.exists(fingerprint, at)
         # fallback in-memory
-        ts = self._dedup_cache.get(fingerprint)
-        if ts and (now - ts) <= ttl:
-            return True
-        return False
+        return self._dedup_store.contains(fingerprint, at)
 
-    def _record_fingerprint(self, fingerprint: str):
-        now = time.time()
+    def _record_fingerprint(self, fingerprint: int, ttl: int, at: Optional[float] = None):
         if self._history_service:
-            try:
-                if hasattr(self._history_service, "record"):
-                    self._history_service.record(fingerprint)
-                    return
-            except Exception:
-                logging.exception("HistoryService record failed; recording to memory.")
+            self._history_service.record(fingerprint, ttl, at)
+            return
         # fallback in-memory
-        self._dedup_cache[fingerprint] = now
+        self._dedup_store.add(fingerprint, ttl, at)
+
+    def _near_duplicate_index(self, destination_id: int, forward_config: ForwardConfig) -> SimHashIndex:
+        distance = int(getattr(forward_config, "near_duplicate_distance", 3))
+        index = self._near_duplicates.get((destination_id, distance))
+        if index is None:
+            index = self._near_duplicates[(destination_id, distance)] = SimHashIndex(distance)
+        return index
+
+    def _is_near_duplicate(self, destination_id: int, text: str, forward_config: ForwardConfig,
+                           at: Optional[float] = None) -> bool:
+        """
+        True if a text within forward_config.near_duplicate_distance bits (SimHash) of this
+        one was sent to destination_id during the dedup_ttl_seconds before ``at``.
+        Texts too short for a meaningful signature never match.
+        """
+        signature = simhash(text or "")
+        if signature is None:
+            return False
+        return self._near_duplicate_index(destination_id, forward_config).find(signature, at) is not None
 
-    async def _enforce_rate_limit(self, destination_id: int, forward_config: ForwardConfig) -> None:
+    def _apply_rate_limit(self, destination_id: int, forward_config: ForwardConfig) -> None:
         """
-        If rate limiting is enabled in forward_config, ensure at least
-        forward_config.min_interval_seconds passed since last send to destination_id.
-        This function will await for the remaining time if necessary.
+        If rate limiting is enabled in forward_config, make the shared rate limiter
+        keep at least forward_config.min_interval_seconds between sends to destination_id.
         """
         if not getattr(forward_config, "rate_limit_enabled", False):
             return
         min_interval = float(getattr(forward_config, "min_interval_seconds", 1.0))
-        now = time.time()
-        last = self._last_sent.get(destination_id)
-        if last is None:
-            self._last_sent[destination_id] = now
-            return
-        elapsed = now - last
-        if elapsed >= min_interval:
-            self._last_sent[destination_id] = now
-            return
-        wait = min_interval - elapsed
-        logging.info(f"Rate limit: sleeping {wait:.2f}s before sending to {destination_id}")
-        # await sleep so we don't exceed rate limits
-        await asyncio.sleep(wait)
-        # record the send time after waiting
-        self._last_sent[destination_id] = time.time()
+        self.rate_limiter.set_peer_interval("send", destination_id, min_interval)
 
     async def forward_message_if_allowed(self, destination_id: int, message, forward_config: ForwardConfig, reply_to: Optional[int] = None, *args, **kwargs):
         text = getattr(message, "text", "") or ""
-
-        if hasattr(self, "filter_message") and not self.filter_message(text, forward_config):
-            try:
-                logging.info("Message blocked by keyword filter")
-            except Exception:
-                pass
+        if not self.admit(destination_id, [message], text, forward_config):
             return None
 
-        # deduplicação
-        if getattr(forward_config, "deduplicate", False):
-            fp = self._fingerprint(message)
-            if self._is_duplicate(fp, getattr(forward_config, "dedup_ttl_seconds", 3600)):
-                logging.info("Duplicate message detected; skipping forward")
-                return None
-            self._record_fingerprint(fp)
-
-        # enforce rate limit per-destination (may await)
-        try:
-            await self._enforce_rate_limit(destination_id, forward_config)
-        except Exception:
-            logging.exception("Rate limit enforcement failed; proceeding to send")
-
-        # ...existing forwarding logic...
         try:
-            return await self.forward_message(destination_id, message, reply_to=reply_to)
+            sent_message = await self.forward_message(destination_id, message, reply_to=reply_to)
         except Exception as e:
             logging.exception("Erro ao encaminhar mensagem no forward_message_if_allowed")
             return None
+        if sent_message:
+            self.remember(destination_id, [message], text, forward_config)
+        return sent_message
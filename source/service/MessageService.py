@@ -1,10 +1,10 @@
-import os
 from telethon import TelegramClient
 from telethon.tl.custom import Dialog
 from telethon.tl.types import Message, User, Chat, Channel
 from telethon.errors import ChatAdminRequiredError
-from source.utils.Constants import MEDIA_FOLDER_PATH
 from source.utils.Console import Terminal
+from source.service.MediaCacheService import MediaCacheService
+from source.service.RateLimiter import RateLimiter
 from typing import Optional, Union
 
 class MessageService:
@@ -17,12 +17,16 @@ class MessageService:
         client (TelegramClient): The Telegram client instance
         console (Console): Rich console instance for output
         chat_service (ChatService): Service for chat-related operations
+        media_cache (MediaCacheService): Shared cache for downloaded media
+        rate_limiter (RateLimiter): Client-wide request limiter
     """
 
     def __init__(self, client: TelegramClient, console: Optional[Terminal] = None):
         self.client = client
         self.console = console or Terminal.console
         self.chat_service = None  # Will be set by Telegram class
+        self.media_cache = MediaCacheService.shared()
+        self.rate_limiter = RateLimiter.for_client(client)
 
     async def delete_messages_from_dialog(self, dialog: Dialog, my_id: int) -> None:
         """Deletes user's messages from a specific dialog.
@@ -35,12 +39,12 @@ class MessageService:
         try:
             self.console.print(f"[bold]Searching in[/bold] [blue]{self.chat_service.get_chat_name(chat)}[/blue]")
             deleted_count = 0
-            async for message in self.client.iter_messages(chat, from_user=my_id):
+            async for message in self.rate_limiter.iter_messages(self.client, chat, from_user=my_id):
                 
                 if message.text:
                     self.console.print(f"[dim]Deleting:[/dim] [white]{message.text[:100]}{'...' if len(message.text) > 100 else ''}[/white]")
 
-                await self.client.delete_messages(chat, message.id)
+                await self.rate_limiter.call("delete", self.client.delete_messages, chat, message.id, peer=chat.id)
                 deleted_count += 1
                 if deleted_count % 10 == 0:  # Progress update every 10 messages
                     self.console.print(f"[green]Deleted {deleted_count} messages...[/green]")
@@ -64,7 +68,7 @@ class MessageService:
         """
         try:
             message_count = 0
-            async for message in self.client.iter_messages(chat, from_user=wanted_user, limit=limit):
+            async for message in self.rate_limiter.iter_messages(self.client, chat, from_user=wanted_user, limit=limit):
                 message_count += 1
                 self.chat_service.print_chat_info(chat, message)
                 
@@ -87,7 +91,7 @@ class MessageService:
                 self.console.print(f"[red]Error processing {self.chat_service.get_chat_name(chat)}: {e}[/red]")
 
     async def download_media(self, message: Message) -> Optional[str]:
-        """Downloads media from a message.
+        """Downloads media from a message, reusing the shared media cache.
         
         Args:
             message: Telegram message containing media
@@ -95,5 +99,4 @@ class MessageService:
         Returns:
             str: Path to downloaded media file, or None if download failed
         """
-        os.makedirs(MEDIA_FOLDER_PATH, exist_ok=True)
-        return await self.client.download_media(message, file=MEDIA_FOLDER_PATH) 
\ No newline at end of file
+        return await self.media_cache.download(self.client, message) 
\ No newline at end of file
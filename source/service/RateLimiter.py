@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+
+from source.service.RequestScheduler import RequestScheduler
+from source.utils.Constants import (RATE_LIMITS, PEER_RATE_LIMITS, FLOOD_WAIT_MAX_SECONDS, FLOOD_WAIT_MAX_RETRIES,
+                                    FLOOD_BACKOFF_FACTOR, RATE_RECOVERY_STEP, HISTORY_PAGE_SIZE)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding at most ``capacity``.
+
+    The rate drops when Telegram answers with a flood wait and creeps back to
+    ``base_rate`` with every successful request. Waiters are served in order.
+
+    Attributes:
+        base_rate (float): Configured tokens per second
+        rate (float): Current tokens per second
+        capacity (float): Maximum burst size
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, waiting for it if necessary.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return time.monotonic() - start
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block(self, seconds: float) -> None:
+        """Slow down after a flood wait and hold every caller for ``seconds``.
+
+        Only one request may go out when the wait is over; tokens refill from then
+        on at the reduced rate.
+        """
+        self.rate = max(self.base_rate * FLOOD_BACKOFF_FACTOR ** 4, self.rate * FLOOD_BACKOFF_FACTOR)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 1
+        self._updated = self.blocked_until
+
+    def recover(self) -> None:
+        """Move the rate a step back towards the configured rate after a success."""
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RATE_RECOVERY_STEP)
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.base_rate = self.rate = rate
+        if capacity is not None:
+            self.capacity = capacity
+            self.tokens = min(self.tokens, capacity)
+
+
+class RateLimiter:
+    """Client-wide request limiter that every service goes through.
+
+    Requests are grouped into method classes (``send``, ``edit``, ``delete``,
+    ``history``, ``download``, ``upload``, ``resolve``), each with its own token
+    bucket; classes listed in ``PEER_RATE_LIMITS`` also get a bucket per peer.
+    A ``FloodWaitError`` blocks and slows down the buckets involved, and the
+    request is retried once the requested wait is over. Waits longer than
+    ``FLOOD_WAIT_MAX_SECONDS`` are raised to the caller. The client's
+    ``flood_sleep_threshold`` is set to 0, so Telethon raises every flood wait
+    instead of sleeping through the short ones, and the limiter sees them all.
+
+    Before taking tokens, every request is admitted by the client's
+    ``RequestScheduler``, so live work goes ahead of bulk work.
+
+    There is one limiter per client, obtained with ``for_client``.
+
+    Attributes:
+        scheduler (RequestScheduler): Priority scheduler in front of the buckets
+        flood_waits (int): Number of flood waits received
+        waited_seconds (float): Total time spent waiting for tokens and flood waits
+    """
+
+    _instances = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, Optional[int]], TokenBucket] = {}
+        self._peer_overrides: Dict[Tuple[str, int], Tuple[float, float]] = {}
+        self.scheduler = RequestScheduler()
+        self.flood_waits = 0
+        self.waited_seconds = 0.0
+
+    @classmethod
+    def for_client(cls, client: TelegramClient) -> "RateLimiter":
+        """The limiter shared by every service using ``client``."""
+        limiter = cls._instances.get(client)
+        if limiter is None:
+            limiter = cls._instances[client] = cls()
+            # Flood waits Telethon sleeps through itself would never slow the buckets down
+            client.flood_sleep_threshold = 0
+        return limiter
+
+    def set_peer_interval(self, method: str, peer_id: int, min_interval: float) -> None:
+        """Allow at most one ``method`` request every ``min_interval`` seconds to a peer."""
+        rate = 1.0 / max(min_interval, 1e-3)
+        # Called for every admitted message; reconfiguring would undo the flood wait backoff
+        if self._peer_overrides.get((method, peer_id)) == (rate, 1.0):
+            return
+        self._peer_overrides[(method, peer_id)] = (rate, 1.0)
+        bucket = self._buckets.get((method, peer_id))
+        if bucket is not None:
+            bucket.set_rate(rate, 1.0)
+
+    def _bucket(self, method: str, peer_id: Optional[int]) -> Optional[TokenBucket]:
+        key = (method, peer_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if peer_id is None:
+                limits = RATE_LIMITS.get(method)
+            else:
+                limits = self._peer_overrides.get(key) or PEER_RATE_LIMITS.get(method)
+            if limits is None:
+                return None
+            bucket = self._buckets[key] = TokenBucket(*limits)
+        return bucket
+
+    def _buckets_for(self, method: str, peer_id: Optional[int]):
+        # Peer bucket first, so a busy peer does not hold a class-wide token while waiting
+        buckets = [self._bucket(method, peer_id)] if peer_id is not None else []
+        buckets.append(self._bucket(method, None))
+        return [bucket for bucket in buckets if bucket is not None]
+
+    async def acquire(self, method: str, peer_id: Optional[int] = None) -> None:
+        """Wait until a ``method`` request to ``peer_id`` may be sent, at the current task's priority."""
+        await self.scheduler.admit(lambda: self._take_tokens(method, peer_id))
+
+    async def _take_tokens(self, method: str, peer_id: Optional[int]) -> None:
+        for bucket in self._buckets_for(method, peer_id):
+            self.waited_seconds += await bucket.acquire()
+
+    def _on_flood_wait(self, method: str, peer_id: Optional[int], seconds: int) -> None:
+        self.flood_waits += 1
+        logger.warning(f"Flood wait of {seconds}s on {method} (peer {peer_id}); slowing down")
+        for bucket in self._buckets_for(method, peer_id):
+            bucket.block(seconds)
+
+    def _on_success(self, method: str, peer_id: Optional[int]) -> None:
+        for bucket in self._buckets_for(method, peer_id):
+            bucket.recover()
+
+    async def call(self, method: str, func: Callable[..., Awaitable[Any]], *args,
+                   peer: Optional[int] = None, **kwargs) -> Any:
+        """Run one request through the limiter, retrying after flood waits.
+
+        ``func`` is called again on every retry, so it must be safe to repeat.
+
+        Args:
+            method: Method class of the request
+            func: Coroutine function doing the request
+            peer: Chat ID the request targets, for per-peer limits
+            *args: Positional arguments for ``func``
+            **kwargs: Keyword arguments for ``func``
+
+        Returns:
+            Whatever ``func`` returns
+        """
+        retries = 0
+        while True:
+            await self.acquire(method, peer)
+            try:
+                result = await func(*args, **kwargs)
+            except FloodWaitError as e:
+                self._on_flood_wait(method, peer, e.seconds)
+                if e.seconds > FLOOD_WAIT_MAX_SECONDS or retries >= FLOOD_WAIT_MAX_RETRIES:
+                    raise
+                retries += 1
+                continue
+            self._on_success(method, peer)
+            return result
+
+    async def iter_messages(self, client: TelegramClient, entity, **kwargs) -> AsyncIterator:
+        """``client.iter_messages`` taking one ``history`` token per page of results.
+
+        After a flood wait the iteration resumes right after the last message it
+        yielded, so callers never see the error or a duplicate.
+
+        Args:
+            client: Telegram client instance
+            entity: Chat to read
+            **kwargs: Arguments of ``TelegramClient.iter_messages``
+        """
+        peer = entity if isinstance(entity, int) else getattr(entity, "id", None)
+        limit = kwargs.pop("limit", None)
+        reverse = kwargs.get("reverse", False)
+        count = 0
+        retries = 0
+        while True:
+            await self.acquire("history", peer)
+            try:
+                async for message in client.iter_messages(
+                        entity, limit=None if limit is None else limit - count, **kwargs):
+                    yield message
+                    count += 1
+                    retries = 0
+                    if count % HISTORY_PAGE_SIZE == 0:
+                        await self.acquire("history", peer)
+                self._on_success("history", peer)
+                return
+            except FloodWaitError as e:
+                self._on_flood_wait("history", peer, e.seconds)
+                if e.seconds > FLOOD_WAIT_MAX_SECONDS or retries >= FLOOD_WAIT_MAX_RETRIES:
+                    raise
+                retries += 1
+                if limit is not None and count >= limit:
+                    return
+                if count:
+                    if reverse:
+                        kwargs["min_id"] = message.id
+                    else:
+                        kwargs["offset_id"] = message.id
+
+    def stats(self) -> dict:
+        return {
+            "flood_waits": self.flood_waits,
+            "waited_seconds": self.waited_seconds,
+            "slowed_down": sorted(f"{method}:{peer}" for (method, peer), bucket in self._buckets.items()
+                                  if bucket.rate < bucket.base_rate),
+            **self.scheduler.stats()
+        }
@@ -0,0 +1,122 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator
+
+from source.utils.Constants import SCHEDULER_MAX_BULK_DELAY, SCHEDULER_LATENCY_SAMPLES
+
+LIVE = "live"
+BULK = "bulk"
+
+# Priority class of the requests made by the current task; tasks inherit it from their creator
+_priority = contextvars.ContextVar("request_priority", default=LIVE)
+
+
+@contextmanager
+def priority(priority_class: str) -> Iterator[None]:
+    """Run the enclosed code, and every task it creates, in ``priority_class``.
+
+    Args:
+        priority_class: ``LIVE`` for interactive and live forwarding work, ``BULK``
+            for history replays, clones, broadcasts and exports
+    """
+    token = _priority.set(priority_class)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class LatencyStats:
+    """Count, mean and percentiles of the most recent admission delays of one class."""
+
+    def __init__(self, samples: int = SCHEDULER_LATENCY_SAMPLES):
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=samples)
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def summary(self) -> dict:
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(p * len(recent)))] if recent else 0.0
+
+        return {
+            "requests": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "max": recent[-1] if recent else 0.0
+        }
+
+
+class RequestScheduler:
+    """Gives live requests precedence over bulk requests on a shared client.
+
+    Requests of the current task's priority class pass through ``admit`` before
+    they take a rate limiter token. Live requests go straight through; a bulk
+    request waits while live work is pending, i.e. a live request is waiting for
+    its token or a queued live forward job (see ``hold_live``) has not finished,
+    so a history catch-up running next to live forwarding yields the flood
+    budget to it. To keep bulk work from starving under constant live traffic,
+    a bulk request never waits longer than ``SCHEDULER_MAX_BULK_DELAY`` seconds.
+
+    Attributes:
+        latency (dict): LatencyStats per priority class, measuring the time from
+            request to token
+    """
+
+    def __init__(self, max_bulk_delay: float = SCHEDULER_MAX_BULK_DELAY):
+        self.max_bulk_delay = max_bulk_delay
+        self.latency: Dict[str, LatencyStats] = {LIVE: LatencyStats(), BULK: LatencyStats()}
+        self.starved = 0
+        self._live_pending = 0
+        self._live_idle = asyncio.Event()
+        self._live_idle.set()
+
+    async def admit(self, acquire: Callable[[], Awaitable[None]]) -> None:
+        """Run ``acquire`` (which takes the rate limiter tokens) at the current task's priority.
+
+        Args:
+            acquire: Coroutine function taking the tokens for the request
+        """
+        priority_class = _priority.get()
+        start = time.monotonic()
+        if priority_class == LIVE:
+            self.hold_live()
+            try:
+                await acquire()
+            finally:
+                self.release_live()
+        else:
+            if not self._live_idle.is_set():
+                try:
+                    await asyncio.wait_for(self._live_idle.wait(), timeout=self.max_bulk_delay)
+                except asyncio.TimeoutError:
+                    self.starved += 1
+            await acquire()
+        self.latency.setdefault(priority_class, LatencyStats()).record(time.monotonic() - start)
+
+    def hold_live(self) -> None:
+        """Mark one unit of live work as pending; bulk requests wait until it is released."""
+        self._live_pending += 1
+        self._live_idle.clear()
+
+    def release_live(self) -> None:
+        """Release live work marked by ``hold_live``."""
+        self._live_pending -= 1
+        if not self._live_pending:
+            self._live_idle.set()
+
+    def stats(self) -> dict:
+        return {
+            "classes": {priority_class: stats.summary() for priority_class, stats in self.latency.items()},
+            "bulk_starvation_releases": self.starved
+        }
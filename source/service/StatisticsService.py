@@ -3,6 +3,8 @@ import json
 from source.utils.Console import Terminal
 from source.model.Chat import Chat
 from source.model.ForwardConfig import ForwardConfig
+from source.service.MediaCacheService import MediaCacheService
+from source.service.RateLimiter import RateLimiter
 from source.utils.Constants import MEDIA_FOLDER_PATH, CHAT_FILE_PATH, FORWARD_CONFIG_FILE_PATH
 
 class StatisticsService:
@@ -68,6 +70,20 @@ class StatisticsService:
         # Storage Stats
         media_size = self.get_directory_size(MEDIA_FOLDER_PATH)
         self.console.print(f"\n[bold]Media Storage:[/bold] {media_size:.2f} MB")
+
+        # Media Cache Stats
+        cache = MediaCacheService.shared().stats()
+        self.console.print(f"\n[bold]Media Cache:[/bold] {cache['files']} files, "
+                           f"{cache['bytes'] / (1024 * 1024):.2f} of {cache['quota_bytes'] / (1024 * 1024):.0f} MB")
+        self.console.print(f"  • Hit rate: {cache['hit_rate']:.1%} ({cache['hits']} hits, {cache['misses']} misses)")
+
+        # Request Scheduling Stats
+        requests = RateLimiter.for_client(client).stats()
+        self.console.print(f"\n[bold]Requests:[/bold] {requests['flood_waits']} flood waits, "
+                           f"{requests['waited_seconds']:.1f}s spent waiting")
+        for priority_class, latency in requests['classes'].items():
+            self.console.print(f"  • {priority_class.capitalize()}: {latency['requests']} requests, "
+                               f"wait p50 {latency['p50']:.2f}s / p95 {latency['p95']:.2f}s / max {latency['max']:.2f}s")
         
         self.console.print("\nPress Enter to return to menu...")
         input()
@@ -3,11 +3,119 @@ CHAT_FILE_PATH = f"{RESOURCE_FILE_PATH}/chats.json"
 CREDENTIALS_FILE_PATH = f"{RESOURCE_FILE_PATH}/credentials.json"
 FORWARD_CONFIG_FILE_PATH = f"{RESOURCE_FILE_PATH}/forwardConfig.json"
 HISTORY_FILE_PATH = f"{RESOURCE_FILE_PATH}/history.json"
+HISTORY_INDEX_FILE_PATH = f"{RESOURCE_FILE_PATH}/history.idx"
+HISTORY_JOURNAL_FILE_PATH = f"{RESOURCE_FILE_PATH}/history.journal"
+CHECKPOINT_FILE_PATH = f"{RESOURCE_FILE_PATH}/checkpoints.json"
+MEDIA_CACHE_INDEX_FILE_PATH = f"{RESOURCE_FILE_PATH}/mediaCache.json"
+DEDUP_STORE_FILE_PATH = f"{RESOURCE_FILE_PATH}/dedup.bin"
 IGNORE_CHATS_FILE_PATH = f"{RESOURCE_FILE_PATH}/ignoreChats.json"
 WANTED_USER_FILE_PATH = f"{RESOURCE_FILE_PATH}/wantedUser.json"
+EXPORT_STATE_FILE_PATH = f"{RESOURCE_FILE_PATH}/exportState.json"
 
 MEDIA_FOLDER_PATH = "media"
 EXPORT_FOLDER_PATH = "exports"
 
 SESSION_FOLDER_PATH = "sessions"
 SESSION_PREFIX_PATH = f"{SESSION_FOLDER_PATH}/session_"
+
+# Number of journaled history mappings before they are compacted into the snapshot
+HISTORY_COMPACT_INTERVAL = 10000
+
+# History forward checkpoints are written at most once per this many seconds (and when the run ends)
+CHECKPOINT_SAVE_INTERVAL = 5
+
+# Deleted messages are propagated in batches of at most DELETE_BATCH_SIZE ids per request,
+# collected for up to DELETE_BATCH_DELAY seconds
+DELETE_BATCH_SIZE = 100
+DELETE_BATCH_DELAY = 1.0
+
+# Maximum number of history messages fetched ahead of the one being forwarded
+HISTORY_PREFETCH_SIZE = 200
+
+# Maximum number of destinations that past forward sends history to at the same time
+HISTORY_CONCURRENCY = 4
+
+# Maximum number of message ids per server-side copy request (Telegram's limit)
+COPY_BATCH_SIZE = 100
+
+# Media downloaded for re-upload stays in memory up to this size (bytes) and spills to a temp file above it
+MEDIA_SPOOL_THRESHOLD = 20 * 1024 * 1024
+
+# Maximum number of album items downloaded or uploaded at the same time
+ALBUM_TRANSFER_CONCURRENCY = 4
+
+# Maximum size (bytes) of the shared media cache in MEDIA_FOLDER_PATH before least recently used files are evicted
+MEDIA_CACHE_QUOTA_BYTES = 2 * 1024 * 1024 * 1024
+
+# Re-uploaded media is copied into the media cache only up to this size (bytes); larger files are not cached
+MEDIA_CACHE_STORE_MAX_BYTES = MEDIA_SPOOL_THRESHOLD
+
+# The media cache index is rewritten at most once per this many seconds (and when the client disconnects)
+MEDIA_CACHE_INDEX_SAVE_INTERVAL = 30
+
+# Live forwarding: pending jobs per lane before event handlers wait, jobs running at once,
+# and how often (seconds) non-empty queue depths are logged
+LIVE_QUEUE_SIZE = 100
+LIVE_WORKER_COUNT = 4
+LIVE_QUEUE_REPORT_INTERVAL = 60
+
+# Client-wide request limits as (requests per second, burst) per method class,
+# and per peer for the classes that Telegram limits per chat
+RATE_LIMITS = {
+    "send": (5.0, 10),
+    "edit": (2.0, 5),
+    "delete": (1.0, 5),
+    "history": (2.0, 5),
+    "download": (10.0, 10),
+    "upload": (10.0, 10),
+    "resolve": (1.0, 5),
+}
+PEER_RATE_LIMITS = {
+    "send": (1.0, 3),
+    "edit": (1.0, 3),
+    "delete": (0.5, 3),
+}
+
+# Flood waits up to FLOOD_WAIT_MAX_SECONDS are waited out and retried (at most FLOOD_WAIT_MAX_RETRIES times);
+# each one multiplies the rate by FLOOD_BACKOFF_FACTOR, and every success gives back RATE_RECOVERY_STEP of it
+FLOOD_WAIT_MAX_SECONDS = 300
+FLOOD_WAIT_MAX_RETRIES = 3
+FLOOD_BACKOFF_FACTOR = 0.5
+RATE_RECOVERY_STEP = 0.05
+
+# Messages returned by one history request
+HISTORY_PAGE_SIZE = 100
+
+# Bulk requests (history, clone, broadcast, export) wait for pending live work at most this long (seconds),
+# so they are never starved; latency statistics keep this many recent samples per priority class
+SCHEDULER_MAX_BULK_DELAY = 5.0
+SCHEDULER_LATENCY_SAMPLES = 1000
+
+# Duplicate detection remembers at most DEDUP_MAX_ENTRIES fingerprints; with DEDUP_PERSIST they are
+# saved to DEDUP_STORE_FILE_PATH every DEDUP_SAVE_INTERVAL new fingerprints and on exit
+DEDUP_MAX_ENTRIES = 100000
+DEDUP_SAVE_INTERVAL = 1000
+DEDUP_PERSIST = True
+# A fingerprint is kept at least this long (wall-clock seconds) after it was recorded, longer if its TTL is longer,
+# so history replays that take a while or resume after a restart still see what they sent
+DEDUP_RETENTION_SECONDS = 24 * 3600
+
+# Near-duplicate detection ignores texts with fewer words and word pairs than this
+NEAR_DUPLICATE_MIN_FEATURES = 8
+
+# Exports are written as messages arrive and flushed to disk every EXPORT_FLUSH_INTERVAL messages
+EXPORT_FLUSH_INTERVAL = 500
+
+# SQLite exports go into one database shared by all chats, inserted EXPORT_SQLITE_BATCH_SIZE messages per transaction
+EXPORT_DATABASE_FILE_PATH = f"{EXPORT_FOLDER_PATH}/exports.db"
+EXPORT_SQLITE_BATCH_SIZE = 1000
+
+# Maximum number of chats a bulk export fetches at the same time (they share one rate limiter)
+EXPORT_CONCURRENCY = 4
+
+# Compressed exports use EXPORT_COMPRESSION ("zstd" needs the optional zstandard package, otherwise gzip is used)
+# and start a new chunk once one reaches EXPORT_CHUNK_BYTES compressed bytes
+EXPORT_COMPRESSION = "zstd"
+EXPORT_CHUNK_BYTES = 64 * 1024 * 1024
+EXPORT_GZIP_LEVEL = 6
+EXPORT_ZSTD_LEVEL = 10
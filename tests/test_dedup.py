@@ -0,0 +1,103 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from source.model import DedupStore as dedup_module
+from source.model import SimHashIndex as simhash_module
+from source.model.DedupStore import DedupStore
+from source.model.SimHashIndex import SimHashIndex, simhash, _features, _MASK, _BITS
+
+
+class DedupStoreTest(unittest.TestCase):
+    def test_window_follows_the_message_time(self):
+        store = DedupStore()
+        store.add(42, ttl=100, at=1000)
+        self.assertTrue(store.contains(42, at=1000))
+        self.assertTrue(store.contains(42, at=1099))
+        self.assertFalse(store.contains(42, at=1100))
+        self.assertFalse(store.contains(42, at=999))
+        # An older message replayed later does not shorten the window of a newer one
+        store.add(7, ttl=100, at=5000)
+        store.add(8, ttl=100, at=10)
+        self.assertTrue(store.contains(7, at=5050))
+        self.assertTrue(store.contains(8, at=50))
+
+    def test_overlapping_windows_are_merged(self):
+        store = DedupStore()
+        store.add(42, ttl=100, at=1000)
+        store.add(42, ttl=100, at=1050)
+        self.assertTrue(store.contains(42, at=1000))
+        self.assertTrue(store.contains(42, at=1149))
+
+    def test_entries_expire_by_wall_clock(self):
+        store = DedupStore(retention=60)
+        now = time.time()
+        store.add(42, ttl=10, at=1000)
+        with mock.patch.object(dedup_module.time, "time", return_value=now + 59):
+            self.assertTrue(store.contains(42, at=1005))
+        with mock.patch.object(dedup_module.time, "time", return_value=now + 61):
+            self.assertFalse(store.contains(42, at=1005))
+            self.assertEqual(len(store), 0)
+
+    def test_round_trip_through_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "dedup.bin")
+            store = DedupStore(path=path)
+            store.add(42, ttl=100, at=1000)
+            store.add(2 ** 64 - 1, ttl=100)
+            store.close()
+
+            store = DedupStore(path=path)
+            self.assertTrue(store.contains(42, at=1050))
+            self.assertFalse(store.contains(42, at=1100))
+            self.assertTrue(store.contains(2 ** 64 - 1))
+
+
+class SimHashTest(unittest.TestCase):
+    TEXT = "the quick brown fox jumps over the lazy dog near the river bank today"
+
+    @staticmethod
+    def reference_simhash(text):
+        features = _features(text)
+        total = sum(features.values())
+        votes = [0] * _BITS
+        for feature, weight in features.items():
+            value = hash(feature) & _MASK
+            for bit in range(_BITS):
+                if value >> bit & 1:
+                    votes[bit] += weight
+        return sum(1 << bit for bit in range(_BITS) if votes[bit] > total / 2)
+
+    def test_simhash_matches_bitwise_voting(self):
+        texts = [self.TEXT, self.TEXT.upper() + " again and again and again",
+                 "https://example.com/path?utm=1 " + self.TEXT, " ".join(["spam"] * 40 + ["eggs"] * 3)]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(simhash(text), self.reference_simhash(text))
+
+    def test_short_text_has_no_signature(self):
+        self.assertIsNone(simhash("hi"))
+
+    def test_window_follows_the_message_time(self):
+        index = SimHashIndex(max_distance=3)
+        signature = simhash(self.TEXT)
+        index.add(signature, ttl=100, at=1000)
+        near = signature ^ 0b101
+        self.assertEqual(index.find(near, at=1050), signature)
+        self.assertIsNone(index.find(near, at=1100))
+        self.assertIsNone(index.find(signature ^ 0b1111, at=1050))
+
+    def test_entries_expire_by_wall_clock(self):
+        index = SimHashIndex(retention=60)
+        signature = simhash(self.TEXT)
+        now = time.time()
+        index.add(signature, ttl=10, at=1000)
+        with mock.patch.object(simhash_module.time, "time", return_value=now + 61):
+            self.assertIsNone(index.find(signature, at=1005))
+            self.assertEqual(len(index), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+
+from source.model.ExportWriter import create_writer
+
+
+def record(message_id):
+    return {"id": message_id, "date": "2024-01-01T00:00:00", "sender_id": 1, "text": f"a]b }}\n{message_id}",
+            "reply_to_msg_id": None, "media": False}
+
+
+class ExportWriterAppendTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, format_type):
+        return os.path.join(self.directory.name, f"export.{format_type}")
+
+    def write(self, format_type, message_ids, close=True):
+        writer = create_writer(format_type, self.path(format_type), 1, "chat", append=True)
+        for message_id in message_ids:
+            writer.write(record(message_id))
+        if close:
+            writer.close()
+        return writer
+
+    def read(self, format_type):
+        with open(self.path(format_type), encoding='utf-8') as file:
+            if format_type == 'json':
+                return json.load(file)
+            return [json.loads(line) for line in file]
+
+    def test_append_continues_the_export(self):
+        for format_type in ('json', 'jsonl'):
+            with self.subTest(format_type=format_type):
+                self.write(format_type, [])
+                self.write(format_type, [1, 2])
+                writer = self.write(format_type, [3, 4, 5])
+                self.assertEqual(writer.resumed_id, 2)
+                self.assertEqual(self.read(format_type), [record(i) for i in range(1, 6)])
+
+    def test_json_layout_matches_json_dump(self):
+        self.write('json', [1, 2, 3])
+        with open(self.path('json'), encoding='utf-8') as file:
+            self.assertEqual(file.read(), json.dumps([record(i) for i in (1, 2, 3)], ensure_ascii=False, indent=4))
+
+    def test_append_recovers_a_killed_export(self):
+        for format_type in ('json', 'jsonl'):
+            with self.subTest(format_type=format_type):
+                writer = self.write(format_type, [1, 2, 3], close=False)
+                writer.flush()
+                self.assertEqual(writer.flushed_id, 3)
+                # The process dies without closing the array, in the middle of the next record
+                writer._file.write('\n    {\n        "id": 4,' if format_type == 'json' else '{"id": 4, "te')
+                writer._file.close()
+
+                writer = self.write(format_type, [4, 5])
+                self.assertEqual(writer.resumed_id, 3)
+                self.assertEqual(writer.flushed_id, 5)
+                self.assertEqual(self.read(format_type), [record(i) for i in range(1, 6)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from array import array
+from unittest import mock
+
+from source.model import History as history_module
+from source.model.History import History
+
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "history.index")
+        self.journal_path = os.path.join(self.directory.name, "history.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self, compact_interval=10000):
+        return History(path=self.path, journal_path=self.journal_path, compact_interval=compact_interval,
+                       legacy_path=None)
+
+    def fill(self, history):
+        expected = {}
+        for source_msg_id in range(1, 301):
+            # Destination ids out of source order exercise the sorted reverse columns
+            dest_msg_id = 5000 - source_msg_id if source_msg_id % 7 == 0 else 10000 + source_msg_id
+            history.add_mapping(1, source_msg_id, 9, dest_msg_id)
+            expected[(1, source_msg_id, 9)] = dest_msg_id
+        history.add_mappings([(2, 5, 9, 77), (2, 6, 8, 78)])
+        expected[(2, 5, 9)] = 77
+        expected[(2, 6, 8)] = 78
+        history.add_mapping(1, 3, 9, 88)
+        expected[(1, 3, 9)] = 88
+        history.remove_mapping(1, 4, 9)
+        del expected[(1, 4, 9)]
+        return expected
+
+    def assert_contents(self, history, expected):
+        self.assertEqual(dict(history.items()), expected)
+        for (source_id, source_msg_id, dest_id), dest_msg_id in expected.items():
+            self.assertEqual(history.get_mapping(source_id, source_msg_id, dest_id), dest_msg_id)
+            self.assertEqual(history.get_source_mapping(dest_id, dest_msg_id), (source_id, source_msg_id))
+        # Overwritten and removed mappings are gone in both directions
+        self.assertIsNone(history.get_source_mapping(9, 10003))
+        self.assertIsNone(history.get_mapping(1, 4, 9))
+        self.assertIsNone(history.get_source_mapping(9, 10004))
+
+    def test_round_trip_through_snapshot(self):
+        history = self.open(compact_interval=100)
+        expected = self.fill(history)
+        self.assert_contents(history, expected)
+        history.close()
+
+        history = self.open()
+        self.assert_contents(history, expected)
+        history.close()
+
+    def test_journal_is_replayed_after_a_crash(self):
+        history = self.open()
+        expected = self.fill(history)
+        # No close: the process dies with every mapping only in the journal
+        history._journal.close()
+
+        history = self.open()
+        self.assert_contents(history, expected)
+        history.close()
+
+    def test_torn_journal_tail_is_discarded(self):
+        history = self.open()
+        expected = self.fill(history)
+        history._journal.close()
+        valid_size = os.path.getsize(self.journal_path)
+        with open(self.journal_path, 'a') as journal:
+            journal.write('[1, 999, 9')
+
+        history = self.open()
+        self.assertEqual(os.path.getsize(self.journal_path), valid_size)
+        self.assert_contents(history, expected)
+        history.add_mapping(1, 1000, 9, 20000)
+        expected[(1, 1000, 9)] = 20000
+        history._journal.close()
+
+        history = self.open()
+        self.assert_contents(history, expected)
+        history.close()
+
+    def test_version_1_snapshot_is_upgraded(self):
+        with open(self.path, 'wb') as file:
+            file.write(history_module._HEADER.pack(b"FWDHIST1", 1))
+            offset = history_module._HEADER.size + history_module._ENTRY.size
+            file.write(history_module._ENTRY.pack(1, 9, offset, 3))
+            file.write(array("q", [1, 2, 3]).tobytes())
+            file.write(array("q", [30, 20, 10]).tobytes())
+
+        history = self.open()
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(8), history_module._MAGIC)
+        self.assertEqual(history.get_source_mapping(9, 20), (1, 2))
+        self.assertEqual(history.get_mapping(1, 3, 9), 10)
+        history.close()
+
+    def test_failed_compaction_keeps_mappings(self):
+        history = self.open()
+        expected = self.fill(history)
+        with mock.patch.object(history_module.os, "replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                history.compact()
+        self.assert_contents(history, expected)
+        history._journal.close()
+
+        history = self.open()
+        self.assert_contents(history, expected)
+        history.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import re
+import unittest
+
+from source.model.KeywordFilter import KeywordFilter
+
+
+def reference_matches(patterns, text):
+    """The original per-keyword test the compiled filter must agree with."""
+    for pattern in patterns:
+        try:
+            if re.search(pattern, text, re.IGNORECASE):
+                return True
+        except re.error:
+            if pattern.lower() in text.lower():
+                return True
+    return False
+
+
+PATTERNS = [
+    "promo", "SALE", "ıstanbul", "straße", "kelvin", "[unclosed", "a+b(", r"\bcat\b", r"(\w)\1",
+    r"(?P<x>ab)(?P=x)", "(?i)caps", "colou?r", "^start", "end$", "İnce", "ſun", ".", "",
+]
+
+TEXTS = [
+    "", "big PROMO today", "Sale!", "ISTANBUL", "İstanbul", "STRASSE", "Straße", "Kelvin", "KELVIN",
+    "this has [unclosed bracket", "a+b( literal", "concatenate", "the cat sat", "aa", "abab", "CAPS",
+    "color", "COLOUR", "start here", "not at start", "the end", "ince", "İNCE", "sun", "SUN", "ſun",
+]
+
+
+class KeywordFilterTest(unittest.TestCase):
+    def test_matches_per_keyword_search(self):
+        for size in range(len(PATTERNS) + 1):
+            patterns = PATTERNS[:size]
+            keyword_filter = KeywordFilter(patterns)
+            for text in TEXTS:
+                with self.subTest(patterns=patterns, text=text):
+                    self.assertEqual(keyword_filter.matches(text), reference_matches(patterns, text))
+
+    def test_each_keyword_alone(self):
+        for pattern in PATTERNS:
+            keyword_filter = KeywordFilter([pattern])
+            for text in TEXTS:
+                with self.subTest(pattern=pattern, text=text):
+                    self.assertEqual(keyword_filter.matches(text), reference_matches([pattern], text))
+
+
+if __name__ == '__main__':
+    unittest.main()